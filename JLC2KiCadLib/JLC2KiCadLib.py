@@ -1,24 +1,173 @@
 import os
-import requests
+import sys
 import json
+import time
 import logging
 import argparse
+from concurrent.futures import wait
+from itertools import chain
 
 from .__version__ import __version__
 from . import helper
-from .footprint.footprint import create_footprint, get_footprint_info
-from .symbol.symbol import create_symbol
+from . import client
+from . import cache
+from . import profiling
+from .bom import read_part_ids
+from .footprint import model_queue
+from .symbol.library import get_library
+from .manifest import get_manifest
 
 
-def add_component(component_id, args):
-    logging.info(f"creating library for component {component_id}")
-    data = json.loads(
-        requests.get(
-            f"https://easyeda.com/api/products/{component_id}/svgs"
-        ).content.decode()
+def already_imported(component_id, args):
+    """
+    Check in the manifest of the output directory that every requested output
+    of the component already exists, without any network request
+    """
+
+    entry = get_manifest(args.output_dir).get(component_id)
+    if not entry:
+        return False
+
+    if args.footprint_creation:
+        footprint_lib, _, footprint_name = entry.get("footprint", "").partition(":")
+        if footprint_lib != args.footprint_lib or not os.path.isfile(
+            os.path.join(args.output_dir, footprint_lib, footprint_name + ".kicad_mod")
+        ):
+            return False
+        if not models_imported(entry, args):
+            return False
+
+    if args.symbol_creation:
+        # without -symbol_lib, the symbol is written to a library of its name
+        library_name = entry.get("symbol_library")
+        if not library_name or library_name != (args.symbol_lib or entry["symbol"]):
+            return False
+        filename = os.path.join(
+            args.output_dir, args.symbol_lib_dir, library_name + ".kicad_sym"
+        )
+        if not os.path.isfile(filename) or entry["symbol"] not in get_library(filename):
+            return False
+
+    return True
+
+
+def models_imported(entry, args):
+    """
+    Check that the 3D model of every requested type was retrieved for the
+    footprint of the manifest `entry` and is still there. The manifest records
+    {model type: True if the model file was written, False if the part has no
+    model}, failed downloads are not recorded.
+    """
+
+    models = entry.get("models")
+    if not isinstance(models, dict):
+        return not args.models
+    for model_type in args.models:
+        if model_type not in models:
+            return False
+        if models[model_type] and not os.path.isfile(
+            model_filename(args, entry["footprint"], model_type)
+        ):
+            return False
+    return True
+
+
+def model_filename(args, footprint, model_type):
+    """
+    Return the path of the `model_type` 3D model of the "lib:name" footprint
+    """
+
+    footprint_lib, _, footprint_name = footprint.partition(":")
+    return os.path.join(
+        args.output_dir,
+        footprint_lib,
+        args.model_dir,
+        f"{footprint_name}.{model_type.lower()}",
     )
 
+
+class ConversionCancelled(Exception):
+    pass
+
+
+def record_outputs(result, args, footprint=None, symbol=None):
+    """
+    Fill the generated file paths of `result` (a converter.Result) from the
+    "lib:name" footprint and (library_name, symbol_name) symbol
+    """
+
+    if footprint:
+        footprint_lib, _, footprint_name = footprint.partition(":")
+        result.footprint = footprint
+        result.footprint_path = os.path.join(
+            args.output_dir, footprint_lib, footprint_name + ".kicad_mod"
+        )
+        for model_type in ("STEP", "WRL"):
+            filename = model_filename(args, footprint, model_type)
+            if model_type in args.models and os.path.isfile(filename):
+                result.model_paths.append(filename)
+    if symbol:
+        result.symbol = symbol[1]
+        result.symbol_library_path = os.path.join(
+            args.output_dir, args.symbol_lib_dir, symbol[0] + ".kicad_sym"
+        )
+
+
+def add_component(component_id, args, progress=None, cancel_event=None, result=None):
+    """
+    Create the footprint, 3D models and symbol of `component_id`.
+    `progress(component_id, stage)` is called when each stage ("fetch",
+    "footprint", "models", "symbol", "done") starts, and ConversionCancelled is
+    raised between stages once `cancel_event` is set. The symbol is created in
+    the background during the footprint stages, "symbol" reports the wait for it.
+    The generated files are recorded in `result` when a converter.Result is given.
+    Return True on success.
+    """
+
+    def report(stage):
+        if cancel_event is not None and cancel_event.is_set():
+            raise ConversionCancelled(component_id)
+        if progress is not None:
+            progress(component_id, stage)
+
+    if args.skip_existing and already_imported(component_id, args):
+        logging.info(f"component {component_id} already imported, skipping")
+        if result is not None:
+            entry = get_manifest(args.output_dir).get(component_id)
+            result.skipped = True
+            record_outputs(
+                result,
+                args,
+                entry.get("footprint") if args.footprint_creation else None,
+                (
+                    (entry["symbol_library"], entry["symbol"])
+                    if args.symbol_creation
+                    else None
+                ),
+            )
+        report("done")
+        return True
+
+    # the footprint and symbol modules are loaded by the first conversion only
+    from .footprint.footprint import create_footprint, get_footprint_info
+    from .symbol.symbol import create_symbol
+
+    report("fetch")
+    logging.info(f"creating library for component {component_id}")
+    with profiling.span("fetch product"):
+        content = client.get_cached(
+            f"{client.EASYEDA_URL}/api/products/{component_id}/svgs",
+            "products",
+            component_id,
+        )
+    if content is None:
+        logging.error(f"failed to get component uuid for {component_id}")
+        return ()
+
+    data = json.loads(content.decode())
+
     if not data["success"]:
+        cache.discard("products", component_id)
         logging.error(
             f"failed to get component uuid for {component_id}\nThe component # is probably wrong. Check a possible typo and that the component exists on easyEDA"
         )
@@ -27,23 +176,26 @@ def add_component(component_id, args):
     footprint_component_uuid = data["result"][-1]["component_uuid"]
     symbol_component_uuid = [i["component_uuid"] for i in data["result"][:-1]]
 
-    if args.footprint_creation:
-        footprint_name, datasheet_link = create_footprint(
-            footprint_component_uuid=footprint_component_uuid,
-            component_id=component_id,
-            footprint_lib=args.footprint_lib,
-            output_dir=args.output_dir,
-            model_base_variable=args.model_base_variable,
-            model_dir=args.model_dir,
-            skip_existing=args.skip_existing,
-            models=args.models,
-        )
-    else:
-        _, datasheet_link, _, _ = get_footprint_info(footprint_component_uuid)
-        footprint_name = ""
+    manifest = get_manifest(args.output_dir)
 
+    # fetch the footprint and symbol documents at once, the symbol only needs
+    # the footprint name and datasheet link to be created
     if args.symbol_creation:
-        create_symbol(
+        client.get_components([footprint_component_uuid] + symbol_component_uuid)
+    footprint_info = get_footprint_info(footprint_component_uuid)
+    if not footprint_info:
+        return ()
+    footprint_name, datasheet_link, _, _ = footprint_info
+    footprint_name = (
+        f"{args.footprint_lib}:{footprint_name}" if args.footprint_creation else ""
+    )
+
+    # the symbol is created in the background while the footprint and its 3D
+    # models are, so that a part takes as long as its slowest stage
+    symbol_stage = None
+    if args.symbol_creation:
+        symbol_stage = helper.submit(
+            create_symbol,
             symbol_component_uuid=symbol_component_uuid,
             footprint_name=footprint_name.replace(
                 ".pretty", ""
@@ -56,11 +208,127 @@ def add_component(component_id, args):
             skip_existing=args.skip_existing,
         )
 
+    failed_models = []
+    try:
+        if args.footprint_creation:
+            # an existing footprint is created again if a requested 3D model
+            # was not retrieved by its import
+            entry = manifest.get(component_id)
+            if entry is not None and entry.get("footprint") != footprint_name:
+                entry = None
+            report("footprint")
+            _, _, models = create_footprint(
+                footprint_component_uuid=footprint_component_uuid,
+                component_id=component_id,
+                footprint_lib=args.footprint_lib,
+                output_dir=args.output_dir,
+                model_base_variable=args.model_base_variable,
+                model_dir=args.model_dir,
+                skip_existing=args.skip_existing
+                and (entry is None or models_imported(entry, args)),
+                models=args.models,
+                progress=report,
+            )
+            recorded = dict((entry or {}).get("models") or {})
+            if models is None:
+                # the existing footprint was kept, record the models it has
+                recorded.update(
+                    (model_type, True)
+                    for model_type in args.models
+                    if os.path.isfile(model_filename(args, footprint_name, model_type))
+                )
+            else:
+                for model_type in args.models:
+                    if model_type not in models:
+                        recorded[model_type] = False  # the part has no 3D model
+                    elif models[model_type]:
+                        recorded[model_type] = True
+                    else:
+                        recorded.pop(model_type, None)
+                        failed_models.append(model_type)
+            manifest.update(component_id, footprint=footprint_name, models=recorded)
+        if symbol_stage is not None:
+            report("symbol")
+    except BaseException:
+        # do not leave the symbol being written once the part is reported failed
+        # or cancelled, the libraries are flushed when the conversion ends
+        if symbol_stage is not None:
+            wait([symbol_stage])
+        raise
+
+    symbol = None
+    if symbol_stage is not None:
+        symbol = symbol_stage.result()
+        if symbol:
+            manifest.update(component_id, symbol_library=symbol[0], symbol=symbol[1])
+
+    if result is not None:
+        record_outputs(result, args, footprint_name, symbol)
+        if failed_models:
+            result.error = f"{' and '.join(failed_models)} 3D model not retrieved"
+    report("done")
+    return not failed_models
+
+
+def iter_components(args):
+    """
+    Yield the part # given on the command line then those of the BOM, once each
+    """
 
-def main():
+    seen = set()
+    components = (component.strip() for component in args.components)
+    if args.bom:
+        components = chain(components, read_part_ids(args.bom))
+    for component in components:
+        if component and component not in seen:
+            seen.add(component)
+            yield component
+
+
+def get_settings(args):
+    """
+    Return the process-wide settings of the parsed arguments, as the keyword
+    arguments of client.configure, cache.configure and model_queue.configure
+    """
+
+    return {
+        "client": dict(
+            # each part being converted fetches its footprint and its symbol
+            # at the same time, while the 3D models are downloaded
+            pool_size=max(args.pool_size, 2 * args.jobs + args.model_jobs),
+            timeout=args.timeout,
+            retries=args.retries,
+            easyeda_url=args.easyeda_url,
+            modules_url=args.modules_url,
+        ),
+        "cache": dict(
+            enabled=args.cache,
+            directory=args.cache_dir,
+            ttl=args.cache_ttl * 3600,
+            max_size=args.cache_max_size * 1024 * 1024,
+            offline=args.offline,
+        ),
+        "model_queue": dict(
+            jobs=args.model_jobs, bandwidth=args.model_bandwidth * 1024
+        ),
+    }
+
+
+def apply_settings(settings):
+    """
+    Configure the network client, the cache and the 3D model queue with the
+    settings returned by get_settings()
+    """
+
+    client.configure(**settings["client"])
+    cache.configure(**settings["cache"])
+    model_queue.configure(**settings["model_queue"])
+
+
+def get_parser():
     parser = argparse.ArgumentParser(
         description="take a JLCPCB part # and create the according component's kicad's library",
-        epilog="example use : \n	JLC2KiCadLib C1337258 C24112 -dir My_lib -symbol_lib My_Symbol_lib --no_footprint",
+        epilog="example use : \n	JLC2KiCadLib C1337258 C24112 -dir My_lib -symbol_lib My_Symbol_lib --no_footprint\n	JLC2KiCadLib --bom my_board_bom.csv -dir My_lib -jobs 8\n	JLC2KiCadLib serve -dir My_lib (see JLC2KiCadLib serve --help)",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
 
@@ -68,10 +336,18 @@ def main():
         "components",
         metavar="JLCPCB_part_#",
         type=str,
-        nargs="+",
+        nargs="*",
         help="List of JLCPCB part # from the components you want to create",
     )
 
+    parser.add_argument(
+        "--bom",
+        dest="bom",
+        type=str,
+        default=None,
+        help='Read the JLCPCB part # from a BOM file (CSV, JSON lines or KiCad BOM export), use "-" to read from stdin. Duplicated part # are only processed once',
+    )
+
     parser.add_argument(
         "-dir",
         dest="output_dir",
@@ -124,7 +400,7 @@ def main():
         nargs="*",
         choices=["STEP", "WRL"],
         type=str,
-        default="STEP",
+        default=["STEP"],
         help="Select the 3D model you want to use. Default is STEP. If both are selected, only the STEP model will be added to the footprint (the WRL model will still be generated alongside the STEP model). If you do not want any model to be generated, use the --models without arguments",
     )
 
@@ -151,6 +427,118 @@ def main():
         help="Use -model_base_variable if you want to specify the base path of the 3D model using a path variable. If the specified variable starts with '$' it is used 'as-is', otherwise it is encapsulated: $(MODEL_BASE_VARIABLE)",
     )
 
+    parser.add_argument(
+        "-jobs",
+        dest="jobs",
+        type=int,
+        default=1,
+        help="Number of components processed in parallel, default is 1",
+    )
+
+    parser.add_argument(
+        "-pool_size",
+        dest="pool_size",
+        type=int,
+        default=10,
+        help="Maximum number of connections per host, raised to 2 x -jobs + -model_jobs if lower. Default is 10",
+    )
+
+    parser.add_argument(
+        "-model_jobs",
+        dest="model_jobs",
+        type=int,
+        default=4,
+        help="Number of 3D models downloaded in parallel, in the background of the conversion. Default is 4",
+    )
+
+    parser.add_argument(
+        "-model_bandwidth",
+        dest="model_bandwidth",
+        type=float,
+        default=0,
+        help="Maximum bandwidth in kB/s shared by the 3D model downloads, default is 0 (no limit)",
+    )
+
+    parser.add_argument(
+        "-timeout",
+        dest="timeout",
+        type=float,
+        default=30,
+        help="Timeout in seconds of each network request, default is 30",
+    )
+
+    parser.add_argument(
+        "-retries",
+        dest="retries",
+        type=int,
+        default=3,
+        help="Number of retries with backoff when the server answers 429 or 5xx, default is 3",
+    )
+
+    parser.add_argument(
+        "-easyeda_url",
+        dest="easyeda_url",
+        type=str,
+        default=None,
+        help='Base URL of the EasyEDA API, default is the JLC2KICAD_EASYEDA_URL environment variable or "https://easyeda.com". Use a separate -cache_dir or --no_cache with a mock server',
+    )
+
+    parser.add_argument(
+        "-modules_url",
+        dest="modules_url",
+        type=str,
+        default=None,
+        help='Base URL of the STEP models storage, default is the JLC2KICAD_MODULES_URL environment variable or "https://modules.easyeda.com"',
+    )
+
+    parser.add_argument(
+        "--offline",
+        dest="offline",
+        action="store_true",
+        help="Use --offline to only use the components already in the cache, without any network request",
+    )
+
+    parser.add_argument(
+        "--no_cache",
+        dest="cache",
+        action="store_false",
+        help="Use --no_cache if you do not want to read or write the components cache",
+    )
+
+    parser.add_argument(
+        "-cache_dir",
+        dest="cache_dir",
+        type=str,
+        default=None,
+        help=f'Set the directory of the components cache, default is "{cache.default_directory()}"',
+    )
+
+    parser.add_argument(
+        "-cache_ttl",
+        dest="cache_ttl",
+        type=float,
+        default=168,
+        help="Set the time in hours after which cached components are downloaded again, default is 168",
+    )
+
+    parser.add_argument(
+        "-cache_max_size",
+        dest="cache_max_size",
+        type=float,
+        default=500,
+        help="Set the maximum size of the cache in MB, oldest entries are evicted beyond it. Default is 500",
+    )
+
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="FILE",
+        help="Use --profile to print the time spent per part # and per stage, the number of requests and the downloaded size at the end of the run. With FILE, the profile is written as JSON into FILE instead",
+    )
+
     parser.add_argument(
         "-logging_level",
         dest="logging_level",
@@ -174,12 +562,42 @@ def main():
         help="Print versin number and exit",
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["serve"]:
+        # imported here as the server module is built on this one
+        from .server import main as serve
+
+        return serve(argv[1:])
+
+    parser = get_parser()
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error("-jobs must be at least 1")
+    if args.model_jobs < 1:
+        parser.error("-model_jobs must be at least 1")
+    if not args.components and not args.bom:
+        parser.error("at least one JLCPCB part # or a --bom file is required")
 
     helper.set_logging(args.logging_level, args.log_file)
 
-    for component in args.components:
-        add_component(component, args)
+    # imported here as the converter module is built on this one
+    from .converter import Converter
+
+    start = time.perf_counter()
+    converter = Converter(args)
+    results = converter.convert(iter_components(args))
+    # log the summary of the 3D model downloads
+    converter.wait_models()
+    if args.profile:
+        profiling.write_report(
+            profiling.report(results, time.perf_counter() - start), args.profile
+        )
 
 
 if __name__ == "__main__" and "PYTHON_EXECUTABLE_MARKER" not in os.environ:
@@ -0,0 +1,145 @@
+import contextlib
+import csv
+import json
+import logging
+import re
+import sys
+
+# LCSC part # such as C1337258. Reference designators of capacitors (C1, C1001 ...)
+# look the same, this is why columns named after LCSC/JLCPCB are preferred and
+# reference columns are never read
+part_pattern = re.compile(r"C\d+")
+long_part_pattern = re.compile(r"C\d{4,}")
+xml_field_pattern = re.compile(r'<field name="([^"]*)">\s*([^<]*?)\s*</field>')
+
+
+def is_part_column(name):
+    name = name.lower()
+    return "lcsc" in name or "jlc" in name
+
+
+def is_reference_column(name):
+    name = name.strip().lower()
+    return (
+        name in ("ref", "refs", "refdes")
+        or name.startswith("reference")
+        or "designator" in name
+    )
+
+
+def open_bom(path):
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, newline="", encoding="utf-8-sig")
+
+
+def read_part_ids(path):
+    """
+    Yield the JLCPCB part # listed in the BOM file `path` ("-" for stdin) as the
+    lines are read. CSV (KiCad BOM exports included), JSON lines, KiCad XML
+    exports and plain lists of part # are supported. Duplicates are removed.
+    """
+
+    seen = set()
+    with open_bom(path) as f:
+        for part_id in parse_lines(f):
+            if part_id not in seen:
+                seen.add(part_id)
+                yield part_id
+
+    logging.info(f"{len(seen)} unique part # read from BOM {path}")
+
+
+def parse_lines(lines):
+    lines = iter(lines)
+    for first_line in lines:
+        if first_line.strip():
+            break
+    else:
+        return
+
+    stripped = first_line.lstrip()
+    if stripped.startswith("{"):
+        yield from parse_json_lines(first_line, lines)
+    elif stripped.startswith("<"):
+        yield from parse_xml_lines(first_line, lines)
+    else:
+        yield from parse_csv_lines(first_line, lines)
+
+
+def parse_json_lines(first_line, lines):
+    for line in prepend(first_line, lines):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            logging.warning(f"BOM : invalid JSON line skipped : {line.strip()}")
+            continue
+        if not isinstance(item, dict):
+            continue
+
+        values = [value for key, value in item.items() if is_part_column(key)]
+        pattern = part_pattern
+        if not values:
+            values = [
+                value for key, value in item.items() if not is_reference_column(key)
+            ]
+            pattern = long_part_pattern
+        part_ids = [
+            value.strip()
+            for value in values
+            if isinstance(value, str) and pattern.fullmatch(value.strip())
+        ]
+        if len(part_ids) > 1 and pattern is long_part_pattern:
+            # a reference designator can not be told from the part #
+            logging.warning(
+                f"BOM : line skipped, several values look like a part # : {line.strip()}. Name the part # key LCSC"
+            )
+            continue
+        yield from part_ids
+
+
+def parse_xml_lines(first_line, lines):
+    for line in prepend(first_line, lines):
+        for name, value in xml_field_pattern.findall(line):
+            if is_part_column(name) and part_pattern.fullmatch(value):
+                yield value
+
+
+def parse_csv_lines(first_line, lines):
+    delimiter = max(",;\t", key=first_line.count)
+    rows = csv.reader(prepend(first_line, lines), delimiter=delimiter)
+
+    header = next(rows)
+    columns = [index for index, name in enumerate(header) if is_part_column(name)]
+    references = {
+        index for index, name in enumerate(header) if is_reference_column(name)
+    }
+    if not (columns or references):
+        # no LCSC column, the first line is already data
+        rows = prepend(header, rows)
+
+    for row in rows:
+        if len(row) == 1:
+            # plain list of part #
+            cells, pattern = row, part_pattern
+        elif columns:
+            cells = [row[index] for index in columns if index < len(row)]
+            pattern = part_pattern
+        else:
+            cells = [cell for index, cell in enumerate(row) if index not in references]
+            pattern = long_part_pattern
+        part_ids = [cell.strip() for cell in cells if pattern.fullmatch(cell.strip())]
+        if len(part_ids) > 1 and not columns:
+            # a reference designator can not be told from the part #
+            logging.warning(
+                f"BOM : row skipped, several values look like a part # : {delimiter.join(row)}. Name the part # column LCSC"
+            )
+            continue
+        yield from part_ids
+
+
+def prepend(item, iterator):
+    yield item
+    yield from iterator
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+_config = {
+    "enabled": True,
+    "directory": None,
+    "ttl": 7 * 24 * 3600,  # seconds
+    "max_size": 500 * 1024 * 1024,  # bytes
+    "offline": False,
+}
+_total_size = None
+_lock = threading.Lock()
+
+# namespaces of the entries, the cache directory may hold other files
+NAMESPACES = ("components", "products")
+_entry_name = re.compile(r"[\w\-]+")
+
+
+def default_directory():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "JLC2KiCadLib", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "JLC2KiCadLib")
+
+
+def configure(enabled=None, directory=None, ttl=None, max_size=None, offline=None):
+    """
+    Update the cache settings, `ttl` is in seconds and `max_size` in bytes
+    """
+
+    global _total_size
+
+    for key, value in (
+        ("enabled", enabled),
+        ("directory", directory),
+        ("ttl", ttl),
+        ("max_size", max_size),
+        ("offline", offline),
+    ):
+        if value is not None:
+            _config[key] = value
+
+    with _lock:
+        _total_size = None
+
+
+def is_offline():
+    return _config["offline"]
+
+
+def _path(namespace, key):
+    directory = _config["directory"] or default_directory()
+    if not _entry_name.fullmatch(key):
+        key = hashlib.sha256(key.encode()).hexdigest()
+    # shard entries on the first characters of the key to keep directories small
+    return os.path.join(directory, namespace, key[:2], key)
+
+
+def load(namespace, key):
+    """
+    Return the cached content for `key`, or None if missing or expired.
+    Expired entries are still served when running offline.
+    """
+
+    if not (_config["enabled"] or _config["offline"]):
+        return None
+
+    path = _path(namespace, key)
+    try:
+        age = time.time() - os.path.getmtime(path)
+        if age > _config["ttl"] and not _config["offline"]:
+            logging.debug(f"cache : {namespace}/{key} expired")
+            discard(namespace, key)
+            return None
+        with open(path, "rb") as f:
+            content = f.read()
+    except OSError:
+        return None
+
+    logging.debug(f"cache : {namespace}/{key} loaded from cache")
+    return content
+
+
+def store(namespace, key, content):
+    """
+    Atomically write `content` for `key`, evicting the oldest entries
+    when the cache grows beyond its maximum size
+    """
+
+    global _total_size
+
+    if not _config["enabled"]:
+        return
+
+    path = _path(namespace, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError:
+        logging.warning(f"cache : failed to store {namespace}/{key}")
+        return
+
+    with _lock:
+        if _total_size is None:
+            _total_size = sum(size for _, size, _ in _entries())
+        else:
+            _total_size += len(content)
+        if _total_size > _config["max_size"]:
+            _evict()
+
+
+def discard(namespace, key):
+    try:
+        os.remove(_path(namespace, key))
+    except OSError:
+        pass
+
+
+def _entries():
+    """
+    Yield (path, size, mtime) of each cache entry, only the shard directories
+    of NAMESPACES are listed and only the files named as entries are returned
+    """
+
+    directory = _config["directory"] or default_directory()
+    for namespace in NAMESPACES:
+        try:
+            shards = os.listdir(os.path.join(directory, namespace))
+        except OSError:
+            continue
+        for shard in shards:
+            try:
+                files = list(os.scandir(os.path.join(directory, namespace, shard)))
+            except OSError:
+                continue
+            for file in files:
+                if file.name[:2] != shard or not _entry_name.fullmatch(file.name):
+                    continue
+                try:
+                    if not file.is_file(follow_symlinks=False):
+                        continue
+                    stat = file.stat()
+                except OSError:
+                    continue
+                yield file.path, stat.st_size, stat.st_mtime
+
+
+def _evict():
+    # remove the least recently written entries until 90% of the maximum size
+    global _total_size
+
+    entries = sorted(_entries(), key=lambda entry: entry[2])
+    _total_size = sum(size for _, size, _ in entries)
+    target = _config["max_size"] * 0.9
+    for path, size, _ in entries:
+        if _total_size <= target:
+            break
+        try:
+            os.remove(path)
+            _total_size -= size
+        except OSError:
+            pass
+    logging.debug(f"cache : evicted entries, size is now {_total_size} bytes")
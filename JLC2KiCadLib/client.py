@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from . import cache
+from . import profiling
+from .helper import atomic_write, with_context
+
+# base URLs of the EasyEDA API and of the 3D model storage, they can point to
+# a mock server (see benchmarks/mock_server.py)
+EASYEDA_URL = os.environ.get("JLC2KICAD_EASYEDA_URL", "https://easyeda.com")
+MODULES_URL = os.environ.get("JLC2KICAD_MODULES_URL", "https://modules.easyeda.com")
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_config = {
+    "pool_size": 10,
+    "timeout": 30,
+    "retries": 3,
+    "backoff_factor": 0.5,
+}
+_sessions = {}
+_sessions_guard = threading.Lock()
+_components = {}
+_components_guard = threading.Lock()
+_executor = None  # fetches the documents of get_components concurrently
+
+
+def configure(
+    pool_size=None,
+    timeout=None,
+    retries=None,
+    backoff_factor=None,
+    easyeda_url=None,
+    modules_url=None,
+):
+    """
+    Update the settings used by the shared sessions and the base URLs.
+    If a setting changes, already opened sessions are closed so that the new
+    settings take effect.
+    """
+
+    global EASYEDA_URL, MODULES_URL
+
+    if easyeda_url:
+        EASYEDA_URL = easyeda_url.rstrip("/")
+    if modules_url:
+        MODULES_URL = modules_url.rstrip("/")
+
+    previous = dict(_config)
+    for key, value in (
+        ("pool_size", pool_size),
+        ("timeout", timeout),
+        ("retries", retries),
+        ("backoff_factor", backoff_factor),
+    ):
+        if value is not None:
+            _config[key] = value
+
+    if _config != previous:
+        close()
+
+
+def close():
+    """
+    Close every pooled connection
+    """
+
+    global _executor
+
+    with _sessions_guard:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        if _executor is not None:
+            # running fetches complete, the next ones use the new pool size
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def get_session(url):
+    """
+    Return the keep-alive session used for the host of `url`, create it if needed
+    """
+
+    host = urlsplit(url).netloc
+    with _sessions_guard:
+        session = _sessions.get(host)
+        if session is None:
+            # requests is imported on first use, it is not needed by --help,
+            # --version or runs served from the cache
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(
+                total=_config["retries"],
+                backoff_factor=_config["backoff_factor"],
+                status_forcelist=RETRY_STATUS_CODES,
+                allowed_methods=frozenset(["GET", "HEAD"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            # threads beyond the pool size wait for a free connection, rather
+            # than opening one that is discarded with a "pool is full" warning
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=_config["pool_size"],
+                pool_block=True,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+            logging.debug(f"opened HTTP session for {host}")
+    return session
+
+
+def get(url, **kwargs):
+    """
+    GET `url` through the shared session of its host, with the configured timeout
+    """
+
+    kwargs.setdefault("timeout", _config["timeout"])
+    profiling.count_request()
+    with profiling.span("http request"):
+        return get_session(url).get(url, **kwargs)
+
+
+def conditional_headers(filename):
+    """
+    Return the headers asking the server to answer 304 if the resource was not
+    modified since `filename` was written
+    """
+
+    try:
+        last_write = formatdate(os.path.getmtime(filename), usegmt=True)
+    except OSError:
+        return {}
+    return {"If-Modified-Since": last_write}
+
+
+def download(url, filename, chunk_size=64 * 1024, revalidate=False, throttle=None):
+    """
+    Stream `url` into `filename` chunk by chunk through a temporary file that is
+    renamed once complete, so memory use does not depend on the download size.
+    With `revalidate`, an existing file is kept if not modified on the server.
+    `throttle(size)` is called for each chunk read, to limit the bandwidth.
+    Return the number of bytes written, or None if the request failed.
+    """
+
+    headers = conditional_headers(filename) if revalidate else {}
+
+    start = time.perf_counter()
+    with get(url, stream=True, headers=headers) as response:
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            logging.info(f"{filename} not modified, keeping it")
+            return 0
+
+        if response.status_code != HTTPStatus.OK:
+            logging.debug(
+                f"request to {url} returned with error code {response.status_code}"
+            )
+            return None
+
+        size = 0
+        with atomic_write(filename, "wb", suffix=".part") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if throttle is not None:
+                    throttle(len(chunk))
+                f.write(chunk)
+                size += len(chunk)
+
+    profiling.count_bytes(size)
+    elapsed = max(time.perf_counter() - start, 1e-6)
+    logging.info(
+        f"downloaded {size / 1024:.1f} kB in {elapsed:.2f} s ({size / 1024 / elapsed:.1f} kB/s)"
+    )
+    return size
+
+
+def get_cached(url, namespace, key):
+    """
+    Return the content of `url`, served from the on-disk cache when possible.
+    Only successful responses are cached. Return None if the content could
+    not be retrieved.
+    """
+
+    content = cache.load(namespace, key)
+    if content is not None:
+        return content
+
+    if cache.is_offline():
+        logging.error(
+            f"{namespace} {key} is not in the cache, can not fetch it offline"
+        )
+        return None
+
+    response = get(url)
+    if response.status_code != HTTPStatus.OK:
+        logging.error(
+            f"request to {url} returned with error code {response.status_code}"
+        )
+        return None
+
+    profiling.count_bytes(len(response.content))
+    cache.store(namespace, key, response.content)
+    return response.content
+
+
+def get_component(component_uuid):
+    """
+    Return the parsed component document of `component_uuid`, or None on failure.
+    Each document is downloaded and parsed at most once until clear_components()
+    is called, concurrent callers asking for the same uuid wait for the first
+    fetch.
+    """
+
+    with _components_guard:
+        future = _components.get(component_uuid)
+        owner = future is None
+        if owner:
+            future = _components[component_uuid] = Future()
+
+    if owner:
+        try:
+            with profiling.span("fetch component"):
+                content = get_cached(
+                    f"{EASYEDA_URL}/api/components/{component_uuid}",
+                    "components",
+                    component_uuid,
+                )
+                data = json.loads(content.decode()) if content is not None else None
+        except Exception as e:
+            future.set_exception(e)
+            data = None
+        else:
+            future.set_result(data)
+
+        if data is None:
+            # do not memoize failures, a later call may succeed
+            with _components_guard:
+                if _components.get(component_uuid) is future:
+                    del _components[component_uuid]
+
+    return future.result()
+
+
+def get_components(component_uuids):
+    """
+    Return the parsed component documents of `component_uuids`, in order, with
+    None for the ones that could not be retrieved. The documents are fetched
+    concurrently, so that several documents cost about one round-trip.
+    """
+
+    global _executor
+
+    if len(component_uuids) < 2:
+        return [get_component(component_uuid) for component_uuid in component_uuids]
+
+    with _sessions_guard:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_config["pool_size"], thread_name_prefix="fetch"
+            )
+        executor = _executor
+
+    # the fetches are accounted to the part being converted by the caller
+    futures = [
+        executor.submit(with_context(get_component), component_uuid)
+        for component_uuid in component_uuids
+    ]
+    return [future.result() for future in futures]
+
+
+def clear_components():
+    """
+    Forget the memoized component documents
+    """
+
+    with _components_guard:
+        _components.clear()
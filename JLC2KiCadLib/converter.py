@@ -0,0 +1,235 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .JLC2KiCadLib import (
+    ConversionCancelled,
+    add_component,
+    apply_settings,
+    get_parser,
+    get_settings,
+)
+from .footprint import model_queue
+from .helper import context_local
+from .symbol.library import flush_libraries
+from .manifest import save_manifests
+from . import client
+from . import profiling
+
+_context = context_local()
+
+# the settings of the network client, the cache and the 3D model queue are
+# process-wide, they are shared by the conversions running at the same time
+_settings_guard = threading.Lock()
+_settings = {"users": 0, "current": None}
+
+
+class Result:
+    """
+    Outcome of the conversion of one JLCPCB part #
+    """
+
+    def __init__(self, component_id):
+        self.component_id = component_id
+        self.success = False
+        self.skipped = False  # already imported, nothing was fetched
+        self.error = None
+        self.footprint = None  # "footprint_lib:footprint_name"
+        self.footprint_path = None
+        self.model_paths = []
+        self.symbol = None
+        self.symbol_library_path = None
+        self.timings = {}  # stage -> seconds
+        self.warnings = []  # warning and error log messages
+        self.profile = profiling.Stats()
+
+    @property
+    def duration(self):
+        return sum(self.timings.values())
+
+    def to_dict(self):
+        return dict(vars(self), duration=self.duration, profile=self.profile.to_dict())
+
+    def __repr__(self):
+        status = "ok" if self.success else f"failed: {self.error}"
+        return f"<Result {self.component_id} {status} in {self.duration:.2f} s>"
+
+
+class WarningCollector(logging.Handler):
+    """
+    Attach the warnings logged while converting a part to its Result, for the
+    results of one convert() call ({component_id: Result})
+    """
+
+    def __init__(self, results):
+        super().__init__(level=logging.WARNING)
+        self.results = results
+
+    def emit(self, record):
+        result = current_result()
+        if result is not None and self.results.get(result.component_id) is result:
+            result.warnings.append(record.getMessage())
+
+
+def current_result():
+    """
+    Return the Result of the part converted by the calling thread, if any
+    """
+
+    return getattr(_context, "result", None)
+
+
+class Converter:
+    """
+    Convert JLCPCB parts into KiCad libraries from a program.
+
+    The settings are the command line options, given as keyword arguments
+    (for example `Converter(output_dir="My_lib", jobs=4, models=["STEP"])`).
+    The HTTP sessions and the caches are kept between calls to convert(), so a
+    long running process only pays for cold connections once.
+
+    A Converter is not an isolated configuration: the network, cache and 3D
+    model queue options (see get_settings()) configure the whole process.
+    They are applied when convert() starts, and convert() raises RuntimeError
+    if they conflict with those of a conversion still running.
+    """
+
+    def __init__(self, args=None, **options):
+        if args is None:
+            args = get_parser().parse_args([])
+        for key, value in options.items():
+            if not hasattr(args, key):
+                raise TypeError(f"unknown option {key!r}")
+            setattr(args, key, value)
+        if args.jobs < 1:
+            raise ValueError("jobs must be at least 1")
+        if args.model_jobs < 1:
+            raise ValueError("model_jobs must be at least 1")
+
+        self.args = args
+        self.settings = get_settings(args)
+
+    def convert(self, part_ids, progress=None, cancel_event=None):
+        """
+        Convert each part # of `part_ids` (an iterable, duplicates are converted
+        once) and return one Result per part #, in order.
+        `progress` and `cancel_event` are passed to add_component.
+        A part fails if one of its 3D models could not be retrieved, its
+        footprint then does not reference that model.
+        """
+
+        results = {}
+
+        def run(component_id):
+            result = results[component_id]
+            _context.result = result
+            stage = [None, time.perf_counter()]
+
+            def on_progress(component_id, new_stage):
+                now = time.perf_counter()
+                if stage[0] is not None:
+                    result.timings[stage[0]] = now - stage[1]
+                stage[:] = new_stage, now
+                if progress is not None:
+                    progress(component_id, new_stage)
+
+            try:
+                with profiling.collect(result.profile):
+                    result.success = bool(
+                        add_component(
+                            component_id, self.args, on_progress, cancel_event, result
+                        )
+                    )
+                if not result.success and result.error is None:
+                    result.error = "conversion failed, see the log for details"
+            except ConversionCancelled:
+                result.error = "cancelled"
+            except Exception as e:
+                logging.exception(f"failed to convert {component_id}")
+                result.error = str(e) or type(e).__name__
+            finally:
+                _context.result = None
+            return result
+
+        collector = WarningCollector(results)
+        with running_conversion(self.settings):
+            logging.getLogger().addHandler(collector)
+            try:
+                if self.args.jobs == 1:
+                    for component_id in part_ids:
+                        if component_id not in results:
+                            results[component_id] = Result(component_id)
+                            run(component_id)
+                else:
+                    with ThreadPoolExecutor(max_workers=self.args.jobs) as executor:
+                        # parts are submitted as soon as they are read from the iterable
+                        futures = []
+                        for component_id in part_ids:
+                            if component_id not in results:
+                                results[component_id] = Result(component_id)
+                                futures.append(executor.submit(run, component_id))
+                        for future in futures:
+                            future.result()
+            finally:
+                logging.getLogger().removeHandler(collector)
+                flush_libraries()
+                save_manifests()
+
+        failed = [result for result in results.values() if not result.success]
+        if len(results) > 1:
+            logging.info(
+                f"{len(results) - len(failed)}/{len(results)} component(s) converted"
+            )
+        for result in failed:
+            logging.error(f"{result.component_id} : {result.error}")
+
+        return list(results.values())
+
+    def wait_models(self):
+        """
+        Wait for the 3D models queued by the conversions, return the summary
+        of the downloads queued since the last conversion started with no other
+        one running (see model_queue.wait())
+        """
+
+        return model_queue.wait()
+
+
+@contextmanager
+def running_conversion(settings):
+    """
+    Apply the process-wide `settings` for the duration of a conversion, raise
+    RuntimeError if a conversion running with other settings is not done.
+    The first of the conversions running together starts a new summary of the
+    3D model downloads. The component documents memoized by the client are
+    forgotten once no conversion runs, so that a long running process fetches
+    them again from the cache, which honours its TTL, and does not keep every
+    one in memory.
+    """
+
+    with _settings_guard:
+        if _settings["users"] and _settings["current"] != settings:
+            conflicts = [
+                f"{module}.{key}"
+                for module, values in settings.items()
+                for key, value in values.items()
+                if _settings["current"][module][key] != value
+            ]
+            raise RuntimeError(
+                "settings conflicting with a running conversion: "
+                + ", ".join(conflicts)
+            )
+        if not _settings["users"]:
+            apply_settings(settings)
+            _settings["current"] = settings
+            model_queue.reset()
+        _settings["users"] += 1
+    try:
+        yield
+    finally:
+        with _settings_guard:
+            _settings["users"] -= 1
+            if not _settings["users"]:
+                client.clear_components()
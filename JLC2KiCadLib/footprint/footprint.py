@@ -1,10 +1,9 @@
-import requests
-import json
 import logging
 import os
 
-from KicadModTree import *
-from .footprint_handlers import *
+from ..helper import file_lock
+from .. import client
+from .. import profiling
 
 
 def create_footprint(
@@ -16,7 +15,15 @@ def create_footprint(
     model_dir,
     skip_existing,
     models,
+    progress=None,
 ):
+    # KicadModTree and the handlers are only loaded once a footprint is created
+    from KicadModTree import Footprint, KicadFileHandler, Text, Translation
+    from .footprint_context import FootprintContext
+    from .footprint_handlers import handlers
+    from .footprint_shapes import mil2mm, tokenize
+    from .model3d import attach_models
+
     logging.info("Creating footprint ...")
 
     (
@@ -32,39 +39,14 @@ def create_footprint(
             os.path.join(output_dir, footprint_lib, footprint_name + ".kicad_mod")
         ):
             logging.info(f"Footprint {footprint_name} already exists, skipping.")
-            return f"{footprint_lib}:{footprint_name}", datasheet_link
+            return f"{footprint_lib}:{footprint_name}", datasheet_link, None
 
     # init kicad footprint
     kicad_mod = Footprint(f'"{footprint_name}"')
     kicad_mod.setDescription(f"{footprint_name} footprint")  # TODO Set real description
     kicad_mod.setTags(f"{footprint_name} footprint {component_id}")
 
-    class footprint_info:
-        def __init__(
-            self,
-            footprint_name,
-            output_dir,
-            footprint_lib,
-            model_base_variable,
-            model_dir,
-            origin,
-            models,
-        ):
-            self.max_X, self.max_Y, self.min_X, self.min_Y = (
-                -10000,
-                -10000,
-                10000,
-                10000,
-            )  # I will be using these to calculate the bounding box because the node.calculateBoundingBox() method does not seems to work for me
-            self.footprint_name = footprint_name
-            self.output_dir = output_dir
-            self.footprint_lib = footprint_lib
-            self.model_base_variable = model_base_variable
-            self.model_dir = model_dir
-            self.origin = origin
-            self.models = models
-
-    footprint_info = footprint_info(
+    footprint_info = FootprintContext(
         footprint_name=footprint_name,
         output_dir=output_dir,
         footprint_lib=footprint_lib,
@@ -72,24 +54,24 @@ def create_footprint(
         model_dir=model_dir,
         origin=translation,
         models=models,
+        skip_existing=skip_existing,
+        progress=progress,
     )
 
-    # for each line in data : use the appropriate handler
-    for line in footprint_shape:
-        args = [
-            i for i in line.split("~") if i
-        ]  # split and remove empty string in list
-        model = args[0]
-        logging.debug(args)
-        if model not in handlers:
-            logging.warning(f"footprint : model not in handler :  {model}")
-        else:
-            handlers.get(model)(args[1:], kicad_mod, footprint_info)
-
-    if any(
-        isinstance(child, Pad) and child.type == Pad.TYPE_THT
-        for child in kicad_mod.getAllChilds()
-    ):
+    with profiling.span("footprint tokenizer"):
+        records = tokenize(footprint_shape)
+
+    # for each shape : use the appropriate handler
+    # (the 3D models are downloaded by the SVGNODE handler, within this span)
+    with profiling.span("footprint handlers"):
+        for record in records:
+            handlers[type(record)](record, kicad_mod, footprint_info)
+
+    # the footprint only references the 3D models actually downloaded
+    with profiling.span("wait 3D models"):
+        models = attach_models(footprint_info, kicad_mod)
+
+    if footprint_info.through_hole:
         kicad_mod.setAttribute("through_hole")
     else:
         kicad_mod.setAttribute("smd")
@@ -137,30 +119,26 @@ def create_footprint(
         )
     )
 
-    if not os.path.exists(f"{output_dir}/{footprint_lib}"):
-        os.makedirs(f"{output_dir}/{footprint_lib}")
+    os.makedirs(f"{output_dir}/{footprint_lib}", exist_ok=True)
 
     # output kicad model
+    filename = f"{output_dir}/{footprint_lib}/{footprint_name}.kicad_mod"
     file_handler = KicadFileHandler(kicad_mod)
-    file_handler.writeFile(f"{output_dir}/{footprint_lib}/{footprint_name}.kicad_mod")
+    with profiling.span("write footprint"), file_lock(filename):
+        file_handler.writeFile(filename)
     logging.info(f"created '{output_dir}/{footprint_lib}/{footprint_name}.kicad_mod'")
 
-    # return the datasheet link and footprint name to be linked with the symbol
-    return (f"{footprint_lib}:{footprint_name}", datasheet_link)
+    # return the datasheet link and footprint name to be linked with the symbol,
+    # and the availability of the 3D models ({model type: bool}, see attach_models)
+    return (f"{footprint_lib}:{footprint_name}", datasheet_link, models)
 
 
 def get_footprint_info(footprint_component_uuid):
     # fetch the component data from easyeda library
-    response = requests.get(
-        f"https://easyeda.com/api/components/{footprint_component_uuid}"
-    )
+    data = client.get_component(footprint_component_uuid)
 
-    if response.status_code == requests.codes.ok:
-        data = json.loads(response.content.decode())
-    else:
-        logging.error(
-            f"create_footprint error. Requests returned with error code {response.status_code}"
-        )
+    if data is None:
+        logging.error("create_footprint error. Could not retrieve the component")
         return ()
 
     footprint_shape = data["result"]["dataStr"]["shape"]
@@ -0,0 +1,156 @@
+from math import ceil, cos, floor, radians, sin
+
+from KicadModTree import Arc, Circle, Line, Model, Pad, Polygon, RectFill, RectLine
+
+
+class FootprintContext:
+    """
+    State of a footprint being built. The nodes are appended to the footprint
+    with append(), which keeps the bounding box, the pad types, the layers and
+    the presence of a 3D model up to date, so that no scan of the footprint
+    is needed once the handlers ran.
+    """
+
+    def __init__(
+        self,
+        footprint_name,
+        output_dir,
+        footprint_lib,
+        model_base_variable,
+        model_dir,
+        origin,
+        models,
+        skip_existing,
+        progress=None,
+    ):
+        # the node.calculateBoundingBox() methods of KicadModTree are not
+        # reliable, the bounding box is computed from the geometry of the nodes
+        self.max_X, self.max_Y, self.min_X, self.min_Y = (
+            -10000,
+            -10000,
+            10000,
+            10000,
+        )
+        self.pad_types = set()
+        self.layers = set()
+        self.has_model = False
+        # (model type, filename, Future of the download or None, Model node)
+        self.pending_models = []
+
+        self.footprint_name = footprint_name
+        self.output_dir = output_dir
+        self.footprint_lib = footprint_lib
+        self.model_base_variable = model_base_variable
+        self.model_dir = model_dir
+        self.origin = origin
+        self.models = models
+        self.skip_existing = skip_existing
+        self.progress = progress
+
+    @property
+    def through_hole(self):
+        return Pad.TYPE_THT in self.pad_types
+
+    def append(self, kicad_mod, node):
+        """
+        Append `node` to kicad_mod and account for it
+        """
+
+        kicad_mod.append(node)
+
+        if isinstance(node, Model):
+            self.has_model = True
+            return
+
+        if isinstance(node, Pad):
+            self.pad_types.add(node.type)
+            self.layers.update(node.layers)
+        elif getattr(node, "layer", None):
+            self.layers.add(node.layer)
+
+        extent = extents.get(type(node))
+        if extent is not None:
+            self.extend(extent(node))
+
+    def extend(self, points):
+        """
+        Grow the bounding box to include the (x, y) `points`
+        """
+
+        self.extend_bounds(*zip(*points))
+
+    def extend_bounds(self, xs, ys):
+        """
+        Grow the bounding box to include the points of coordinates `xs`, `ys`
+        """
+
+        self.max_X = max(self.max_X, max(xs))
+        self.min_X = min(self.min_X, min(xs))
+        self.max_Y = max(self.max_Y, max(ys))
+        self.min_Y = min(self.min_Y, min(ys))
+
+
+def line_extent(line):
+    return [(line.start_pos.x, line.start_pos.y), (line.end_pos.x, line.end_pos.y)]
+
+
+def pad_extent(pad):
+    if pad.shape == Pad.SHAPE_CUSTOM and pad.primitives:
+        # custom pads are drawn by their primitives, relative to the pad
+        return [
+            (pad.at.x + node.x, pad.at.y + node.y)
+            for primitive in pad.primitives
+            for node in primitive.nodes
+        ]
+
+    # corners of the pad rotated by the pad rotation
+    angle = radians(pad.rotation)
+    half_x = abs(pad.size.x * cos(angle)) / 2 + abs(pad.size.y * sin(angle)) / 2
+    half_y = abs(pad.size.x * sin(angle)) / 2 + abs(pad.size.y * cos(angle)) / 2
+    return [
+        (pad.at.x - half_x, pad.at.y - half_y),
+        (pad.at.x + half_x, pad.at.y + half_y),
+    ]
+
+
+def arc_extent(arc):
+    radius, start = arc.start_pos.to_polar(origin=arc.center_pos, use_degrees=True)
+    end = start + arc.angle
+
+    # the ends of the arc, and the quadrant points it goes through
+    angles = [start, end] + [
+        90 * quadrant
+        for quadrant in range(
+            ceil(min(start, end) / 90), floor(max(start, end) / 90) + 1
+        )
+    ]
+    return [
+        (
+            arc.center_pos.x + radius * cos(radians(angle)),
+            arc.center_pos.y + radius * sin(radians(angle)),
+        )
+        for angle in angles
+    ]
+
+
+def circle_extent(circle):
+    return [
+        (circle.center_pos.x - circle.radius, circle.center_pos.y - circle.radius),
+        (circle.center_pos.x + circle.radius, circle.center_pos.y + circle.radius),
+    ]
+
+
+def polygon_extent(polygon):
+    return [(node.x, node.y) for node in polygon.nodes]
+
+
+# extent of each node type, as the points to include in the bounding box
+extents = {
+    Line: line_extent,
+    Pad: pad_extent,
+    Arc: arc_extent,
+    Circle: circle_extent,
+    Polygon: polygon_extent,
+    RectLine: line_extent,
+    RectFill: line_extent,
+}
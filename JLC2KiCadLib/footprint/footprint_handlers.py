@@ -1,7 +1,7 @@
-import json
 import logging
+from itertools import repeat
 from math import pow, acos, pi, sqrt
-import re
+from operator import sub
 
 from KicadModTree import (
     Line,
@@ -15,6 +15,8 @@ from KicadModTree import (
     RectLine,
 )
 from .model3d import get_WrlModel, get_StepModel
+from . import footprint_shapes as shapes
+from .footprint_shapes import mil2mm
 
 __all__ = [
     "handlers",
@@ -48,67 +50,33 @@ layer_correspondance = {
 }
 
 
-def mil2mm(data):
-    return float(data) / 3.937
-
+def h_TRACK(track, kicad_mod, footprint_info):
+    width = track.width
+    count = len(track.points) // 2
+    if count < 2:
+        return
+    xs = track.points[0 : 2 * count : 2]
+    ys = track.points[1 : 2 * count : 2]
 
-def h_TRACK(data, kicad_mod, footprint_info):
-    data[0] = mil2mm(data[0])
-    width = data[0]
     try:
-        points = [mil2mm(p) for p in data[2].split(" ") if p]
+        layer = layer_correspondance[track.layer]
     except Exception:
-        if len(data) > 5:
-            points = [mil2mm(p) for p in data[3].split(" ") if p]
-        else:
-            logging.warning(
-                "footprint handler, h_TRACK: error while parsing the line's points, skipping line"
-            )
-            return ()
-
-    for i in range(int(len(points) / 2) - 1):
-        start = [points[2 * i], points[2 * i + 1]]
-        end = [points[2 * i + 2], points[2 * i + 3]]
-        try:
-            layer = layer_correspondance[data[1]]
-        except Exception:
-            logging.exception("footprint h_TRACK: layer correspondance not found")
-            layer = "F.SilkS"
+        logging.exception("footprint h_TRACK: layer correspondance not found")
+        layer = "F.SilkS"
 
-        # update footprint borders
-        footprint_info.max_X = max(footprint_info.max_X, start[0], end[0])
-        footprint_info.min_X = min(footprint_info.min_X, start[0], end[0])
-        footprint_info.max_Y = max(footprint_info.max_Y, start[1], end[1])
-        footprint_info.min_Y = min(footprint_info.min_Y, start[1], end[1])
+    # account for the whole track at once rather than segment by segment
+    footprint_info.extend_bounds(xs, ys)
+    footprint_info.layers.add(layer)
 
-        # append line to kicad_mod
+    # append one line per segment to kicad_mod
+    points = list(zip(xs, ys))
+    for start, end in zip(points, points[1:]):
         kicad_mod.append(Line(start=start, end=end, width=width, layer=layer))
 
 
-def h_PAD(data, kicad_mod, footprint_info):
+def h_PAD(pad, kicad_mod, footprint_info):
     """
     Append a pad to the footprint
-
-    data : [
-        0 : shape type
-        1 : pad position x
-        2 : pad position y
-        3 : pad size x
-        4 : pad size y
-        5 : layer
-        6 : pad number
-        7 : drill size
-        8 : Polygon nodes "skipped for some shapes"
-        9 : rotation
-        10 :
-        11 : drill offset
-        12 :
-        13 :
-        14 :
-        15 :
-        16 :
-        17 : ? position
-    ]
     """
 
     # PAD layer definition
@@ -116,20 +84,14 @@ def h_PAD(data, kicad_mod, footprint_info):
     BOTTOMLAYER = "2"
     MULTILAYER = "11"
 
-    shape_type = data[0]
-    at = [mil2mm(data[1]), mil2mm(data[2])]
-    size = [mil2mm(data[3]), mil2mm(data[4])]
-    layer = data[5]
-    pad_number = data[6]
-    drill_diameter = float(mil2mm(data[7])) * 2
+    at = [pad.x, pad.y]
+    size = [pad.width, pad.height]
+    layer = pad.layer
+    pad_number = pad.number
+    drill_diameter = pad.drill_diameter
     drill_size = drill_diameter
-
-    # Some shape do not have coordinates, insert empty data to realign later index
-    if shape_type in ["ELLIPSE"]:
-        data.insert(8, "")
-
-    rotation = float(data[9])
-    drill_offset = float(mil2mm(data[11]))
+    rotation = pad.rotation
+    drill_offset = pad.drill_offset
 
     primitives = ""
 
@@ -149,7 +111,7 @@ def h_PAD(data, kicad_mod, footprint_info):
         pad_type = Pad.TYPE_SMT
         pad_layer = Pad.LAYERS_SMT
 
-    if data[0] == "OVAL":
+    if pad.shape == "OVAL":
         shape = Pad.SHAPE_OVAL
 
         if drill_offset == 0:
@@ -161,7 +123,7 @@ def h_PAD(data, kicad_mod, footprint_info):
         else:
             drill_size = [drill_offset, drill_diameter]
 
-    elif data[0] == "RECT":
+    elif pad.shape == "RECT":
         shape = Pad.SHAPE_RECT
 
         if drill_offset == 0:
@@ -169,15 +131,16 @@ def h_PAD(data, kicad_mod, footprint_info):
         else:
             drill_size = [drill_diameter, drill_offset]
 
-    elif data[0] == "ELLIPSE":
+    elif pad.shape == "ELLIPSE":
         shape = Pad.SHAPE_CIRCLE
 
-    elif data[0] == "POLYGON":
+    elif pad.shape == "POLYGON":
         shape = Pad.SHAPE_CUSTOM
-        points = []
-        for i, coord in enumerate(data[8].split(" ")):
-            points.append(mil2mm(coord) - at[i % 2])
-        primitives = [Polygon(nodes=zip(points[::2], points[1::2]))]
+        nodes = zip(
+            map(sub, pad.points[0::2], repeat(at[0])),
+            map(sub, pad.points[1::2], repeat(at[1])),
+        )
+        primitives = [Polygon(nodes=nodes)]
         size = [0.1, 0.1]
 
         if drill_offset == 0:  # Check if the hole is oval
@@ -191,13 +154,8 @@ def h_PAD(data, kicad_mod, footprint_info):
         )
         shape = Pad.SHAPE_OVAL
 
-    # update footprint borders
-    footprint_info.max_X = max(footprint_info.max_X, at[0])
-    footprint_info.min_X = min(footprint_info.min_X, at[0])
-    footprint_info.max_Y = max(footprint_info.max_Y, at[1])
-    footprint_info.min_Y = min(footprint_info.min_Y, at[1])
-
-    kicad_mod.append(
+    footprint_info.append(
+        kicad_mod,
         Pad(
             number=pad_number,
             type=pad_type,
@@ -208,55 +166,25 @@ def h_PAD(data, kicad_mod, footprint_info):
             drill=drill_size,
             layers=pad_layer,
             primitives=primitives,
-        )
+        ),
     )
 
 
-def h_ARC(data, kicad_mod, footprint_info):
+def h_ARC(arc, kicad_mod, footprint_info):
     """
     append an Arc to the footprint
     """
     # pylint: disable=unused-argument
 
     try:
-
-        # "S$xx" is sometimes inserted at index 2 ?
-        if "$" in data[2]:
-            svg_path = data[3]
-        else:
-            svg_path = data[2]
-
-        # Regular expression to match ARC pattern
-        # coordinates can sometime be separated by a "," instead of a space, therefore we match it using [\s,*?]
-        pattern = r"M\s*([\d\.\-]+)[\s,*?]([\d\.\-]+)\s?A\s*([\d\.\-]+)[\s,*?]([\d\.\-]+) ([\d\.\-]+) (\d) (\d) ([\d\.\-]+)[\s,*?]([\d\.\-]+)"
-
-        match = re.search(pattern, svg_path)
-
-        if not match:
-            logging.error("footprint handler, h_ARC: Failed to parse ARC")
-            return
-
-        # Extract values
-        start_x, start_y = float(match.group(1)), float(match.group(2))
-        rx, ry = float(match.group(3)), float(match.group(4))
-        _ = float(match.group(5))  # rotation ?
-        large_arc_flag = int(match.group(6))
-        sweep_flag = int(match.group(7))
-        end_x, end_y = float(match.group(8)), float(match.group(9))
-
-        width = data[0]
-
-        width = mil2mm(width)
-        start_x = mil2mm(start_x)
-        start_y = mil2mm(start_y)
-        mid_x = mil2mm(rx)
-        mid_y = mil2mm(ry)
-        end_x = mil2mm(end_x)
-        end_y = mil2mm(end_y)
-
-        start = [start_x, start_y]
-        end = [end_x, end_y]
-        if sweep_flag == 0:
+        large_arc_flag = arc.large_arc
+        width = arc.width
+        mid_x = arc.radius_x
+        mid_y = arc.radius_y
+
+        start = arc.start
+        end = arc.end
+        if arc.sweep == 0:
             start, end = end, start
 
         # find the midpoint of start and end
@@ -301,7 +229,7 @@ def h_ARC(data, kicad_mod, footprint_info):
         )
 
         try:
-            layer = layer_correspondance[data[1]]
+            layer = layer_correspondance[arc.layer]
         except KeyError:
             logging.warning(
                 "footprint handler, h_ARC : layer correspondance not found. Adding arc on default F.Silks layer"
@@ -311,177 +239,158 @@ def h_ARC(data, kicad_mod, footprint_info):
         if large_arc_flag == 1:
             angle = 360 - angle
 
-        kicad_mod.append(
-            Arc(start=start, end=end, width=width, center=cen, layer=layer)
+        footprint_info.append(
+            kicad_mod, Arc(start=start, end=end, width=width, center=cen, layer=layer)
         )
 
     except Exception:
         logging.exception("footprint handler, h_ARC: failed to add ARC")
 
 
-def h_CIRCLE(data, kicad_mod, footprint_info):
+def h_CIRCLE(circle, kicad_mod, footprint_info):
     # append a Circle to the footprint
 
-    if (
-        data[4] == "100"
-    ):  # they want to draw a circle on pads, we don't want that. This is an empirical deduction, no idea if this is correct, but it seems to work on my tests
-        return ()
-
-    data[0] = mil2mm(data[0])
-    data[1] = mil2mm(data[1])
-    data[2] = mil2mm(data[2])
-    data[3] = mil2mm(data[3])
-
-    center = [data[0], data[1]]
-    radius = data[2]
-    width = data[3]
+    center = [circle.x, circle.y]
+    radius = circle.radius
+    width = circle.width
 
     try:
-        layer = layer_correspondance[data[4]]
+        layer = layer_correspondance[circle.layer]
     except KeyError:
         logging.exception(
             "footprint handler, h_CIRCLE : layer correspondance not found"
         )
         layer = "F.SilkS"
 
-    kicad_mod.append(Circle(center=center, radius=radius, width=width, layer=layer))
+    footprint_info.append(
+        kicad_mod, Circle(center=center, radius=radius, width=width, layer=layer)
+    )
 
 
-def h_SOLIDREGION(data, kicad_mod, footprint_info):
+def h_SOLIDREGION(region, kicad_mod, footprint_info):
     try:
         # edge cut in footprint
-        if data[2] == "npth":
-            if (
-                "A" in data[1]
-            ):  # A is present for when arcs are in the shape, help is needed to parse and format these
+        if region.kind == "npth":
+            if region.points is None:
+                # arcs are in the shape, help is needed to parse and format these
                 logging.warning(
                     "footprint handler : h_SOLIDREGION, Edge.Cuts shape not handled, see https://github.com/TousstNicolas/JLC2KiCad_lib/issues/41 for more informations"
                 )
                 return
 
-            # use regular expression to find all the numeric values in the string that come after "M" or "L" (other shapes are not yet handled)
-            matches = re.findall(
-                r"(?:M|L)\s+([-+]?\d*\.?\d+)\s+([-+]?\d*\.?\d+)", data[1]
-            )
-
-            # convert the list of numbers to a list of tuples with x, y coordinates
-            points = [(mil2mm(m[0]), mil2mm(m[1])) for m in matches]
-
             # appends nods to footprint
-            kicad_mod.append(Polygon(nodes=points, layer="Edge.Cuts"))
+            footprint_info.append(
+                kicad_mod, Polygon(nodes=region.points, layer="Edge.Cuts")
+            )
 
     except Exception:
         logging.exception("footprint handler, h_SOLIDREGION: failed to add SOLIDREGION")
         return
 
 
-def h_SVGNODE(data, kicad_mod, footprint_info):
+def h_SVGNODE(node, kicad_mod, footprint_info):
     # create 3D model as a WRL file
-    # parse json data
-    try:
-        data = json.loads(data[0])
-    except Exception:
-        logging.exception("footprint handler, h_SVGNODE : failed to parse json data")
-        return ()
+    if footprint_info.progress is not None:
+        footprint_info.progress("models")
 
-    c_origin = data["attrs"]["c_origin"].split(",")
     if "STEP" in footprint_info.models:
         get_StepModel(
-            component_uuid=data["attrs"]["uuid"],
+            component_uuid=node.uuid,
             footprint_info=footprint_info,
             kicad_mod=kicad_mod,
-            translationX=float(c_origin[0]),
-            translationY=float(c_origin[1]),
-            translationZ=data["attrs"]["z"],
-            rotation=data["attrs"]["c_rotation"],
+            translationX=node.origin[0],
+            translationY=node.origin[1],
+            translationZ=node.z,
+            rotation=node.rotation,
         )
 
     if "WRL" in footprint_info.models:
         get_WrlModel(
-            component_uuid=data["attrs"]["uuid"],
+            component_uuid=node.uuid,
             footprint_info=footprint_info,
             kicad_mod=kicad_mod,
-            translationX=float(c_origin[0]),
-            translationY=float(c_origin[1]),
-            translationZ=data["attrs"]["z"],
-            rotation=data["attrs"]["c_rotation"],
+            translationX=node.origin[0],
+            translationY=node.origin[1],
+            translationZ=node.z,
+            rotation=node.rotation,
         )
 
 
-def h_VIA(data, kicad_mod, footprint_info):
+def h_VIA(via, kicad_mod, footprint_info):
     logging.warning(
         "VIA not supported. Via are often added for better heat dissipation. Be careful and read datasheet if needed."
     )
 
 
-def h_RECT(data, kicad_mod, footprint_info):
-    Xstart = float(mil2mm(data[0]))
-    Ystart = float(mil2mm(data[1]))
-    Xdelta = float(mil2mm(data[2]))
-    Ydelta = float(mil2mm(data[3]))
-    start = [Xstart, Ystart]
-    end = [Xstart + Xdelta, Ystart + Ydelta]
-    width = mil2mm(data[7])
+def h_RECT(rect, kicad_mod, footprint_info):
+    start = [rect.x, rect.y]
+    end = [rect.x + rect.width, rect.y + rect.height]
+    width = rect.stroke_width
 
     if width == 0:
         # filled:
-        kicad_mod.append(
+        footprint_info.append(
+            kicad_mod,
             RectFill(
                 start=start,
                 end=end,
-                layer=layer_correspondance[data[4]],
-            )
+                layer=layer_correspondance[rect.layer],
+            ),
         )
     else:
         # not filled:
-        kicad_mod.append(
+        footprint_info.append(
+            kicad_mod,
             RectLine(
                 start=start,
                 end=end,
                 width=width,
-                layer=layer_correspondance[data[4]],
-            )
+                layer=layer_correspondance[rect.layer],
+            ),
         )
 
 
-def h_HOLE(data, kicad_mod, footprint_info):
-    kicad_mod.append(
+def h_HOLE(hole, kicad_mod, footprint_info):
+    footprint_info.append(
+        kicad_mod,
         Pad(
             number="",
             type=Pad.TYPE_NPTH,
             shape=Pad.SHAPE_CIRCLE,
-            at=[mil2mm(data[0]), mil2mm(data[1])],
-            size=mil2mm(data[2]) * 2,
+            at=[hole.x, hole.y],
+            size=hole.radius * 2,
             rotation=0,
-            drill=mil2mm(data[2]) * 2,
+            drill=hole.radius * 2,
             layers=Pad.LAYERS_NPTH,
-        )
+        ),
     )
 
 
-def h_TEXT(data, kicad_mod, footprint_info):
+def h_TEXT(text, kicad_mod, footprint_info):
     try:
-        kicad_mod.append(
+        footprint_info.append(
+            kicad_mod,
             Text(
                 type="user",
-                at=[mil2mm(data[1]), mil2mm(data[2])],
-                text=data[8],
+                at=[text.x, text.y],
+                text=text.text,
                 layer="F.SilkS",
-            )
+            ),
         )
     except Exception:
         logging.warning("footprint handler, h_TEXT: failed to add text")
 
 
+# handler of each footprint_shapes record type
 handlers = {
-    "TRACK": h_TRACK,
-    "PAD": h_PAD,
-    "ARC": h_ARC,
-    "CIRCLE": h_CIRCLE,
-    "SOLIDREGION": h_SOLIDREGION,
-    "SVGNODE": h_SVGNODE,
-    "VIA": h_VIA,
-    "RECT": h_RECT,
-    "HOLE": h_HOLE,
-    "TEXT": h_TEXT,
+    shapes.Track: h_TRACK,
+    shapes.Pad: h_PAD,
+    shapes.Arc: h_ARC,
+    shapes.Circle: h_CIRCLE,
+    shapes.SolidRegion: h_SOLIDREGION,
+    shapes.SvgNode: h_SVGNODE,
+    shapes.Via: h_VIA,
+    shapes.Rect: h_RECT,
+    shapes.Hole: h_HOLE,
+    shapes.Text: h_TEXT,
 }
@@ -0,0 +1,363 @@
+import json
+import logging
+import re
+from array import array
+from itertools import chain, repeat
+from operator import truediv
+
+# coordinates of an ARC path, they can be separated by a "," instead of a space
+arc_pattern = re.compile(
+    r"M\s*([\d\.\-]+)[\s,*?]([\d\.\-]+)\s?A\s*([\d\.\-]+)[\s,*?]([\d\.\-]+) ([\d\.\-]+) (\d) (\d) ([\d\.\-]+)[\s,*?]([\d\.\-]+)"
+)
+# points of a SOLIDREGION path, only "M" and "L" commands are handled
+region_point_pattern = re.compile(r"(?:M|L)\s+([-+]?\d*\.?\d+)\s+([-+]?\d*\.?\d+)")
+
+
+def mil2mm(data):
+    return float(data) / 3.937
+
+
+def to_mm(values):
+    """
+    Convert a sequence of EasyEDA coordinates (strings or numbers) into an
+    array of mm, in a single pass
+    """
+
+    return array("d", map(truediv, map(float, values), repeat(3.937)))
+
+
+class Shape:
+    """
+    Record of one line of an EasyEDA footprint `shape` array, with its
+    coordinates already converted to mm.
+
+    parse(fields) builds the record from the "~" separated fields of the line
+    (without the type and the empty fields) and returns None for lines to skip.
+    Malformed lines of a `strict` type raise, others are logged and skipped.
+    """
+
+    __slots__ = ()
+    strict = False
+
+
+class Track(Shape):
+    __slots__ = ("width", "layer", "points")
+
+    def __init__(self, width, layer, points):
+        self.width = width
+        self.layer = layer
+        self.points = points  # array x0, y0, x1, y1 ...
+
+    @classmethod
+    def parse(cls, fields):
+        width = mil2mm(fields[0])
+        try:
+            points = to_mm(fields[2].split())
+        except Exception:
+            if len(fields) > 5:
+                points = to_mm(fields[3].split())
+            else:
+                logging.warning(
+                    "footprint handler, h_TRACK: error while parsing the line's points, skipping line"
+                )
+                return None
+        return cls(width, fields[1], points)
+
+
+class Pad(Shape):
+    __slots__ = (
+        "shape",
+        "x",
+        "y",
+        "width",
+        "height",
+        "layer",
+        "number",
+        "drill_diameter",
+        "points",
+        "rotation",
+        "drill_offset",
+    )
+    strict = True
+
+    def __init__(
+        self,
+        shape,
+        x,
+        y,
+        width,
+        height,
+        layer,
+        number,
+        drill_diameter,
+        points,
+        rotation,
+        drill_offset,
+    ):
+        self.shape = shape
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.layer = layer
+        self.number = number
+        self.drill_diameter = drill_diameter
+        self.points = points  # array of the nodes of POLYGON pads, None otherwise
+        self.rotation = rotation
+        self.drill_offset = drill_offset
+
+    @classmethod
+    def parse(cls, fields):
+        """
+        fields : [
+            0 : shape type
+            1 : pad position x
+            2 : pad position y
+            3 : pad size x
+            4 : pad size y
+            5 : layer
+            6 : pad number
+            7 : drill radius
+            8 : Polygon nodes "skipped for some shapes"
+            9 : rotation
+            10 :
+            11 : drill offset
+            ...
+            17 : ? position
+        ]
+        """
+
+        shape = fields[0]
+        # Some shape do not have coordinates, insert empty data to realign later index
+        if shape == "ELLIPSE":
+            fields.insert(8, "")
+        points = None
+        if shape == "POLYGON":
+            points = to_mm(fields[8].split(" "))
+
+        return cls(
+            shape,
+            mil2mm(fields[1]),
+            mil2mm(fields[2]),
+            mil2mm(fields[3]),
+            mil2mm(fields[4]),
+            fields[5],
+            fields[6],
+            mil2mm(fields[7]) * 2,
+            points,
+            float(fields[9]),
+            mil2mm(fields[11]),
+        )
+
+
+class Arc(Shape):
+    __slots__ = (
+        "width",
+        "layer",
+        "start",
+        "radius_x",
+        "radius_y",
+        "large_arc",
+        "sweep",
+        "end",
+    )
+
+    def __init__(self, width, layer, start, radius_x, radius_y, large_arc, sweep, end):
+        self.width = width
+        self.layer = layer
+        self.start = start
+        self.radius_x = radius_x
+        self.radius_y = radius_y
+        self.large_arc = large_arc
+        self.sweep = sweep
+        self.end = end
+
+    @classmethod
+    def parse(cls, fields):
+        # "S$xx" is sometimes inserted at index 2 ?
+        svg_path = fields[3] if "$" in fields[2] else fields[2]
+
+        match = arc_pattern.search(svg_path)
+        if not match:
+            logging.error("footprint handler, h_ARC: Failed to parse ARC")
+            return None
+
+        return cls(
+            width=mil2mm(fields[0]),
+            layer=fields[1],
+            start=[mil2mm(match.group(1)), mil2mm(match.group(2))],
+            radius_x=mil2mm(match.group(3)),
+            radius_y=mil2mm(match.group(4)),
+            large_arc=int(match.group(6)),
+            sweep=int(match.group(7)),
+            end=[mil2mm(match.group(8)), mil2mm(match.group(9))],
+        )
+
+
+class Circle(Shape):
+    __slots__ = ("x", "y", "radius", "width", "layer")
+    strict = True
+
+    def __init__(self, x, y, radius, width, layer):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.width = width
+        self.layer = layer
+
+    @classmethod
+    def parse(cls, fields):
+        if fields[4] == "100":
+            # they want to draw a circle on pads, we don't want that. This is an
+            # empirical deduction, no idea if this is correct, but it seems to work
+            return None
+        return cls(
+            mil2mm(fields[0]),
+            mil2mm(fields[1]),
+            mil2mm(fields[2]),
+            mil2mm(fields[3]),
+            fields[4],
+        )
+
+
+class SolidRegion(Shape):
+    __slots__ = ("kind", "points")
+
+    def __init__(self, kind, points):
+        self.kind = kind
+        self.points = points  # [(x, y) ...] or None if the path has arcs
+
+    @classmethod
+    def parse(cls, fields):
+        kind = fields[2]
+        if kind != "npth":
+            # only edge cuts are handled
+            return cls(kind, None)
+        if "A" in fields[1]:
+            # A is present for when arcs are in the shape
+            return cls(kind, None)
+        coords = to_mm(chain.from_iterable(region_point_pattern.findall(fields[1])))
+        return cls(kind, list(zip(coords[0::2], coords[1::2])))
+
+
+class SvgNode(Shape):
+    __slots__ = ("uuid", "origin", "z", "rotation")
+
+    def __init__(self, uuid, origin, z, rotation):
+        self.uuid = uuid
+        self.origin = origin  # in mil, as the model translations
+        self.z = z
+        self.rotation = rotation
+
+    @classmethod
+    def parse(cls, fields):
+        attrs = json.loads(fields[0])["attrs"]
+        c_origin = attrs["c_origin"].split(",")
+        return cls(
+            attrs["uuid"],
+            (float(c_origin[0]), float(c_origin[1])),
+            attrs["z"],
+            attrs["c_rotation"],
+        )
+
+
+class Via(Shape):
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, fields):
+        return cls()
+
+
+class Rect(Shape):
+    __slots__ = ("x", "y", "width", "height", "layer", "stroke_width")
+    strict = True
+
+    def __init__(self, x, y, width, height, layer, stroke_width):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.layer = layer
+        self.stroke_width = stroke_width
+
+    @classmethod
+    def parse(cls, fields):
+        return cls(
+            mil2mm(fields[0]),
+            mil2mm(fields[1]),
+            mil2mm(fields[2]),
+            mil2mm(fields[3]),
+            fields[4],
+            mil2mm(fields[7]),
+        )
+
+
+class Hole(Shape):
+    __slots__ = ("x", "y", "radius")
+    strict = True
+
+    def __init__(self, x, y, radius):
+        self.x = x
+        self.y = y
+        self.radius = radius
+
+    @classmethod
+    def parse(cls, fields):
+        return cls(mil2mm(fields[0]), mil2mm(fields[1]), mil2mm(fields[2]))
+
+
+class Text(Shape):
+    __slots__ = ("x", "y", "text")
+
+    def __init__(self, x, y, text):
+        self.x = x
+        self.y = y
+        self.text = text
+
+    @classmethod
+    def parse(cls, fields):
+        return cls(mil2mm(fields[1]), mil2mm(fields[2]), fields[8])
+
+
+shape_types = {
+    "TRACK": Track,
+    "PAD": Pad,
+    "ARC": Arc,
+    "CIRCLE": Circle,
+    "SOLIDREGION": SolidRegion,
+    "SVGNODE": SvgNode,
+    "VIA": Via,
+    "RECT": Rect,
+    "HOLE": Hole,
+    "TEXT": Text,
+}
+
+
+def tokenize(footprint_shape):
+    """
+    Parse the `shape` array of an EasyEDA footprint into Shape records, in one
+    pass over its lines
+    """
+
+    records = []
+    for line in footprint_shape:
+        fields = [field for field in line.split("~") if field]
+        logging.debug(fields)
+        shape_type = shape_types.get(fields[0])
+        if shape_type is None:
+            logging.warning(f"footprint : model not in handler :  {fields[0]}")
+            continue
+
+        if shape_type.strict:
+            record = shape_type.parse(fields[1:])
+        else:
+            try:
+                record = shape_type.parse(fields[1:])
+            except Exception:
+                logging.exception(f"footprint : failed to parse {fields[0]}, skipped")
+                continue
+        if record is not None:
+            records.append(record)
+
+    return records
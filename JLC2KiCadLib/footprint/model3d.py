@@ -1,9 +1,15 @@
-import requests
 import logging
 import os
-import re
+from http import HTTPStatus
+from itertools import chain
 from KicadModTree import Model
 
+from ..helper import atomic_write, file_lock
+from .. import client
+from .. import cache
+from .. import profiling
+from . import model_queue
+
 wrl_header = """#VRML V2.0 utf8
 #created by JLC2KiCad_lib using the JLCPCB library
 #for more info see https://github.com/TousstNicolas/JLC2KICAD_lib
@@ -23,26 +29,23 @@ def get_StepModel(
     translationZ,
     rotation,
 ):
-    logging.info(f"Downloading STEP Model ...")
-
-    # `qAxj6KHrDKw4blvCG8QJPs7Y` is a constant in
-    # https://modules.lceda.cn/smt-gl-engine/0.8.22.6032922c/smt-gl-engine.js
-    # and points to the bucket containing the step files.
-
-    response = requests.get(
-        f"https://modules.easyeda.com/qAxj6KHrDKw4blvCG8QJPs7Y/{component_uuid}"
-    )
-
-    if not response.status_code == requests.codes.ok:
-        logging.error("request error, no Step model found")
-        return
-
     ensure_footprint_lib_directories_exist(footprint_info)
     filename = f"{footprint_info.output_dir}/{footprint_info.footprint_lib}/{footprint_info.model_dir}/{footprint_info.footprint_name}.step"
-    with open(filename, "wb") as f:
-        f.write(response.content)
 
-    logging.info(f"STEP model created at {filename}")
+    # the model is downloaded in the background while the footprint is built,
+    # and added to the footprint by attach_models() once available
+    future = None
+    if os.path.isfile(filename) and (
+        footprint_info.skip_existing or cache.is_offline()
+    ):
+        logging.info(f"STEP model {filename} already exists, skipping download")
+    elif cache.is_offline():
+        logging.warning("running offline, STEP model not downloaded")
+    else:
+        logging.info(f"Queuing STEP model download of {filename} ...")
+        future = model_queue.enqueue(
+            filename, download_StepModel, component_uuid, filename
+        )
 
     if footprint_info.model_base_variable:
         if footprint_info.model_base_variable.startswith("$"):
@@ -56,14 +59,18 @@ def get_StepModel(
     translationY = -(translationY - footprint_info.origin[1]) / 100
     translationZ = float(translationZ) / 100
 
-    kicad_mod.append(
-        Model(
-            filename=path_name,
-            at=[translationX, translationY, translationZ],
-            rotate=[-float(axis_rotation) for axis_rotation in rotation.split(",")],
+    footprint_info.pending_models.append(
+        (
+            "STEP",
+            filename,
+            future,
+            Model(
+                filename=path_name,
+                at=[translationX, translationY, translationZ],
+                rotate=[-float(axis_rotation) for axis_rotation in rotation.split(",")],
+            ),
         )
     )
-    logging.info(f"added {path_name} to footprint")
 
 
 def get_WrlModel(
@@ -75,79 +82,233 @@ def get_WrlModel(
     translationZ,
     rotation,
 ):
-    logging.info("Creating WRL model ...")
+    ensure_footprint_lib_directories_exist(footprint_info)
+    filename = f"{footprint_info.output_dir}/{footprint_info.footprint_lib}/{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"
 
-    response = requests.get(
-        f"https://easyeda.com/analyzer/api/3dmodel/{component_uuid}"
-    )
-    if response.status_code == requests.codes.ok:
-        text = response.content.decode()
+    future = None
+    if os.path.isfile(filename) and (
+        footprint_info.skip_existing or cache.is_offline()
+    ):
+        logging.info(f"WRL model {filename} already exists, skipping download")
+    elif cache.is_offline():
+        logging.warning("running offline, WRL model not downloaded")
+    else:
+        logging.info("Queuing WRL model creation ...")
+        future = model_queue.enqueue(
+            filename, download_WrlModel, component_uuid, filename
+        )
+
+    if footprint_info.model_base_variable:
+        if footprint_info.model_base_variable.startswith("$"):
+            path_name = f'"{footprint_info.model_base_variable}/{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"'
+        else:
+            path_name = f'"$({footprint_info.model_base_variable})/{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"'
     else:
-        logging.error("request error, no 3D model found")
-        return ()
+        path_name = f"{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"
 
-    wrl_content = wrl_header
+    translationX = (translationX - footprint_info.origin[0]) / 100
+    translationY = -(translationY - footprint_info.origin[1]) / 100
+    translationZ = float(translationZ) / 100
 
-    # get material list
-    pattern = "newmtl .*?endmtl"
-    matchs = re.findall(pattern=pattern, string=text, flags=re.DOTALL)
+    footprint_info.pending_models.append(
+        (
+            "WRL",
+            filename,
+            future,
+            Model(
+                filename=path_name,
+                at=[translationX, translationY, translationZ],
+                rotate=[-float(axis_rotation) for axis_rotation in rotation.split(",")],
+            ),
+        )
+    )
 
-    materials = {}
-    for match in matchs:
-        material = {}
-        material_id = ""
-        for value in match.split("\n"):
-            if value[0:6] == "newmtl":
-                material_id = value.split(" ")[1]
-            elif value[0:2] == "Ka":
-                material["ambientColor"] = value.split(" ")[1:]
-            elif value[0:2] == "Kd":
-                material["diffuseColor"] = value.split(" ")[1:]
-            elif value[0:2] == "Ks":
-                material["specularColor"] = value.split(" ")[1:]
-            elif value[0] == "d":
-                material["transparency"] = value.split(" ")[1]
-
-        materials[material_id] = material
-
-    # get vertices list
-    pattern = "v (.*?)\n"
-    matchs = re.findall(pattern=pattern, string=text, flags=re.DOTALL)
-
-    vertices = []
-    for vertice in matchs:
-        vertices.append(
-            " ".join(
-                [str(round(float(coord) / 2.54, 4)) for coord in vertice.split(" ")]
+
+def attach_models(footprint_info, kicad_mod):
+    """
+    Wait for the 3D models requested for the footprint and add the first one
+    available to it, the STEP model being requested before the WRL one.
+    Return {model type: True if the model file is available, False if not}.
+    """
+
+    available = {}
+    for model_type, filename, future, model in footprint_info.pending_models:
+        if future is not None:
+            # the download returns None on failure
+            available[model_type] = future.result() is not None
+        else:
+            available[model_type] = os.path.isfile(filename)
+
+        if not available[model_type]:
+            logging.error(
+                f"{model_type} model {filename} could not be retrieved, it is not added to the footprint"
             )
+        elif footprint_info.has_model:
+            # Check if a model has already been added to the footprint to prevent duplicates
+            logging.info(
+                f"{model_type} model was not added to the footprint to prevent duplicates"
+            )
+        else:
+            footprint_info.append(kicad_mod, model)
+            logging.info(f"added {model.filename} to footprint")
+    return available
+
+
+def download_StepModel(component_uuid, filename):
+    """
+    Download the STEP model of `component_uuid` into `filename`. Return the
+    size of the model, 0 if not modified since the last download, or None
+    """
+
+    # `qAxj6KHrDKw4blvCG8QJPs7Y` is a constant in
+    # https://modules.lceda.cn/smt-gl-engine/0.8.22.6032922c/smt-gl-engine.js
+    # and points to the bucket containing the step files.
+
+    # stream the model to disk, STEP files can weigh tens of MB.
+    # An existing file is only downloaded again if modified on the server
+    with profiling.span("STEP model"), file_lock(filename):
+        size = client.download(
+            f"{client.MODULES_URL}/qAxj6KHrDKw4blvCG8QJPs7Y/{component_uuid}",
+            filename,
+            revalidate=True,
+            throttle=model_queue.throttle,
         )
 
-    # get shape list
-    shapes = text.split("usemtl")[1:]
-    for shape in shapes:
-        lines = shape.split("\n")
-        material = materials[lines[0].replace(" ", "")]
-        index_counter = 0
-        link_dict = {}
-        coordIndex = []
-        points = []
-        for line in lines[1:]:
-            if len(line) > 0:
-                face = [int(index) for index in line.replace("//", "").split(" ")[1:]]
-                face_index = []
-                for index in face:
-                    if index not in link_dict:
-                        link_dict[index] = index_counter
-                        face_index.append(str(index_counter))
-                        points.append(vertices[index - 1])
-                        index_counter += 1
-                    else:
-                        face_index.append(str(link_dict[index]))
-                face_index.append("-1")
-                coordIndex.append(",".join(face_index) + ",")
-        points.insert(-1, points[-1])
-
-        shape_str = f"""
+    if size is None:
+        logging.error("request error, no Step model found")
+    elif size:
+        logging.info(f"STEP model created at {filename}")
+    return size
+
+
+def download_WrlModel(component_uuid, filename):
+    """
+    Download the OBJ model of `component_uuid` and convert it into `filename`.
+    Return the size of the OBJ model, 0 if not modified since the last
+    conversion, or None
+    """
+
+    # An existing model is only converted again if modified on the server
+    with client.get(
+        f"{client.EASYEDA_URL}/analyzer/api/3dmodel/{component_uuid}",
+        headers=client.conditional_headers(filename),
+        stream=True,
+    ) as response:
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            logging.info(f"WRL model {filename} not modified, keeping it")
+            return 0
+        if response.status_code != HTTPStatus.OK:
+            logging.error("request error, no 3D model found")
+            return None
+
+        chunks = []
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            model_queue.throttle(len(chunk))
+            chunks.append(chunk)
+    content = b"".join(chunks)
+
+    profiling.count_bytes(len(content))
+    # convert into a temporary file renamed once complete, so that a failed
+    # conversion does not leave a truncated model behind
+    with profiling.span("WRL conversion"), file_lock(filename), atomic_write(
+        filename, suffix=".part"
+    ) as f:
+        obj_to_wrl(content.decode(), f)
+    logging.info(f"WRL model created at {filename}")
+    return len(content)
+
+
+def obj_to_wrl(text, f):
+    """
+    Convert an OBJ model from EASYEDA into VRML, written to the file object `f`.
+    The OBJ text is parsed in a single pass, vertices and faces are converted in
+    bulk and each shape is written as soon as the next one starts.
+    """
+
+    f.write(wrl_header)
+
+    materials = {}
+    vertices = [None]  # OBJ indices start at 1
+    vertex_lines = []  # vertex lines not converted yet
+    material = None  # material being parsed
+    shape = None  # (material, face lines) of the shape being parsed
+
+    for line in text.split("\n"):
+        if shape is not None and line[0:1] == "f":
+            shape[1].append(line)
+        elif line[0:2] == "v ":
+            vertex_lines.append(line[2:])
+        elif material is not None:
+            if line.startswith("endmtl"):
+                material = None
+            elif line[0:2] == "Ka":
+                material["ambientColor"] = line.split(" ")[1:]
+            elif line[0:2] == "Kd":
+                material["diffuseColor"] = line.split(" ")[1:]
+            elif line[0:2] == "Ks":
+                material["specularColor"] = line.split(" ")[1:]
+            elif line[0:1] == "d":
+                material["transparency"] = line.split(" ")[1]
+        elif line.startswith("newmtl"):
+            material = materials[line.split(" ")[1]] = {}
+        elif line.startswith("usemtl"):
+            if shape is not None:
+                vertices += convert_vertices(vertex_lines)
+                vertex_lines = []
+                write_wrl_shape(f, shape[0], parse_faces(shape[1]), vertices)
+            shape = (materials[line[6:].replace(" ", "")], [])
+        elif shape is not None and line:
+            shape[1].append(line)
+
+    if shape is not None:
+        vertices += convert_vertices(vertex_lines)
+        write_wrl_shape(f, shape[0], parse_faces(shape[1]), vertices)
+
+
+def convert_vertices(lines):
+    """
+    Convert OBJ vertex lines to VRML units, return one "x y z" string per line
+    """
+
+    coords = " ".join(lines).split(" ")
+    if len(coords) != 3 * len(lines):
+        # not only xyz vertices, convert line by line
+        return [
+            " ".join(["%.4f" % (float(coord) / 2.54) for coord in line.split(" ")])
+            for line in lines
+        ]
+
+    values = iter([float(coord) / 2.54 for coord in coords])
+    return list(map("%.4f %.4f %.4f".__mod__, zip(values, values, values)))
+
+
+def parse_faces(lines):
+    """
+    Return the vertex indices of each OBJ face line, as strings
+    """
+
+    tokens = " ".join(lines).replace("//", "").split(" ")
+    if len(tokens) != 4 * len(lines):
+        # not only triangles, parse line by line
+        return [line.replace("//", "").split(" ")[1:] for line in lines]
+
+    del tokens[::4]  # "f" prefixes
+    indices = iter(tokens)
+    return list(zip(indices, indices, indices))
+
+
+def write_wrl_shape(f, material, faces, vertices):
+    # number the vertices of the shape in order of first use
+    used = dict.fromkeys(chain.from_iterable(faces))
+    link_dict = dict(zip(used, map(str, range(len(used)))))
+    points = list(map(vertices.__getitem__, map(int, used)))
+    points.insert(-1, points[-1])
+    coordIndex = ",-1,".join(
+        ",".join([link_dict[index] for index in face]) for face in faces
+    )
+
+    f.write(
+        f"""
 Shape{{
 	appearance Appearance {{
 		material  Material 	{{ 
@@ -163,61 +324,17 @@ Shape{{
 		solid FALSE
 		coord DEF co Coordinate {{
 			point [
-				{(", ").join(points)}
-			]
-		}}
-		coordIndex [
-			{"".join(coordIndex)}
-		]
-	}}
-}}"""
-
-        wrl_content += shape_str
-
-    ensure_footprint_lib_directories_exist(footprint_info)
-
-    filename = f"{footprint_info.output_dir}/{footprint_info.footprint_lib}/{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"
-    with open(filename, "w") as f:
-        f.write(wrl_content)
-
-    if footprint_info.model_base_variable:
-        if footprint_info.model_base_variable.startswith("$"):
-            path_name = f'"{footprint_info.model_base_variable}/{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"'
-        else:
-            path_name = f'"$({footprint_info.model_base_variable})/{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"'
-    else:
-        path_name = f"{footprint_info.model_dir}/{footprint_info.footprint_name}.wrl"
-
-    translationX = (translationX - footprint_info.origin[0]) / 100
-    translationY = -(translationY - footprint_info.origin[1]) / 100
-    translationZ = float(translationZ) / 100
-
-    # Check if a model has already been added to the footprint to prevent duplicates
-    if any(isinstance(child, Model) for child in kicad_mod.getAllChilds()):
-        logging.info(f"WRL model created at {filename}")
-        logging.info(
-            f"WRL model was not added to the footprint to prevent duplicates with STEP model"
-        )
-    else:
-        kicad_mod.append(
-            Model(
-                filename=path_name,
-                at=[translationX, translationY, translationZ],
-                rotate=[-float(axis_rotation) for axis_rotation in rotation.split(",")],
-            )
-        )
-        logging.info(f"added {path_name} to footprintc")
+				"""
+    )
+    f.write(", ".join(points))
+    f.write("\n\t\t\t]\n\t\t}\n\t\tcoordIndex [\n\t\t\t")
+    f.write(coordIndex)
+    f.write(",-1,")
+    f.write("\n\t\t]\n\t}\n}")
 
 
 def ensure_footprint_lib_directories_exist(footprint_info):
-    if not os.path.exists(
-        f"{footprint_info.output_dir}/{footprint_info.footprint_lib}"
-    ):
-        os.makedirs(f"{footprint_info.output_dir}/{footprint_info.footprint_lib}")
-
-    if not os.path.exists(
-        f"{footprint_info.output_dir}/{footprint_info.footprint_lib}/{footprint_info.model_dir}"
-    ):
-        os.makedirs(
-            f"{footprint_info.output_dir}/{footprint_info.footprint_lib}/{footprint_info.model_dir}"
-        )
+    os.makedirs(
+        f"{footprint_info.output_dir}/{footprint_info.footprint_lib}/{footprint_info.model_dir}",
+        exist_ok=True,
+    )
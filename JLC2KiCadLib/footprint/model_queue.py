@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from ..helper import with_context
+
+_config = {
+    "jobs": 4,
+    "bandwidth": 0,  # bytes per second shared by the downloads, 0 is no limit
+}
+_executor = None
+_pending = {}  # filename -> Future
+_guard = threading.Lock()
+_summary = None
+
+
+class Throttle:
+    """
+    Limit the rate of the data read by every download to `rate` bytes per
+    second on average. Each chunk reserves the next free time slot of the
+    link and waits for its end.
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __call__(self, size):
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.next_slot = max(self.next_slot, now) + size / self.rate
+            delay = self.next_slot - now
+        time.sleep(delay)
+
+
+throttle = Throttle(0)
+
+
+def new_summary():
+    return {
+        "downloaded": 0,
+        "not_modified": 0,
+        "failed": [],
+        "bytes": 0,
+        "start": None,
+    }
+
+
+def configure(jobs=None, bandwidth=None):
+    """
+    Set the number of concurrent model downloads and the bandwidth cap of the
+    queue, in bytes per second (0 for no limit). The new number of downloads
+    applies once the queued ones are done.
+    """
+
+    global _executor
+
+    with _guard:
+        if jobs is not None and jobs != _config["jobs"]:
+            _config["jobs"] = jobs
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+                _executor = None
+        if bandwidth is not None:
+            _config["bandwidth"] = bandwidth
+            throttle.rate = bandwidth
+
+
+def enqueue(filename, function, *args):
+    """
+    Fill `filename` in the background by calling function(*args), which returns
+    the number of bytes written, 0 if the file was not modified, or None on
+    failure. A file already queued is not queued twice.
+    Return the Future of the download.
+    """
+
+    global _executor, _summary
+
+    with _guard:
+        future = _pending.get(filename)
+        if future is not None:
+            return future
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_config["jobs"], thread_name_prefix="model"
+            )
+        if _summary is None:
+            _summary = new_summary()
+            _summary["start"] = time.perf_counter()
+
+        # the downloads are accounted to the part that queued them, and to the
+        # summary of the run they were queued by
+        future = _pending[filename] = _executor.submit(
+            with_context(run), _summary, filename, function, *args
+        )
+    return future
+
+
+def run(summary, filename, function, *args):
+    try:
+        size = function(*args)
+    except Exception:
+        logging.exception(f"failed to download the 3D model {filename}")
+        size = None
+
+    with _guard:
+        del _pending[filename]
+        if size is None:
+            summary["failed"].append(filename)
+        elif size == 0:
+            summary["not_modified"] += 1
+        else:
+            summary["downloaded"] += 1
+            summary["bytes"] += size
+    return size
+
+
+def reset():
+    """
+    Start a new summary for the downloads queued from now on, those already
+    queued are accounted to the previous one
+    """
+
+    global _summary
+
+    with _guard:
+        _summary = None
+
+
+def wait():
+    """
+    Wait for the queued downloads, log and return the summary of those queued
+    since the last call or reset()
+    {"downloaded", "not_modified", "failed" (filenames), "bytes", "duration"},
+    or None if no download was queued since then
+    """
+
+    global _summary
+
+    while True:
+        with _guard:
+            futures = list(_pending.values())
+        if not futures:
+            break
+        wait_futures(futures)
+
+    with _guard:
+        summary, _summary = _summary, None
+    if summary is None:
+        return None
+
+    summary["duration"] = time.perf_counter() - summary.pop("start")
+    logging.info(
+        f"3D models : {summary['downloaded']} downloaded ({summary['bytes'] / 1024 / 1024:.1f} MB), {summary['not_modified']} not modified, {len(summary['failed'])} failed in {summary['duration']:.2f} s"
+    )
+    for filename in summary["failed"]:
+        logging.error(f"3D model {filename} could not be downloaded")
+    return summary
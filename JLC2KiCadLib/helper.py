@@ -1,8 +1,28 @@
 import logging
+import os
+import stat
 import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+_stdout_handler = None
+_context_locals = []
+_executor = None
+_executor_guard = threading.Lock()
+
+# os.umask can only be read by setting it, which is done once on import, before
+# any thread may create files
+_umask = os.umask(0o022)
+os.umask(_umask)
 
 
 def set_logging(logging_level, logging_file):
+    global _stdout_handler
+
     LOGGING_FILE = "JLC2KiCad_lib.log"
 
     if logging_file:
@@ -12,8 +32,95 @@ def set_logging(logging_level, logging_file):
 
     root_logger = logging.getLogger()
     root_logger.setLevel(logging_level)
-    handler = logging.StreamHandler(sys.stdout)
+    # set_logging may be called for each conversion (GUI), keep a single handler
+    if _stdout_handler is not None:
+        root_logger.removeHandler(_stdout_handler)
+    handler = _stdout_handler = logging.StreamHandler(sys.stdout)
     handler.setLevel(logging.INFO)
     root_logger.addHandler(handler)
     formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
     handler.setFormatter(formatter)
+
+
+def file_lock(path):
+    """
+    return the lock shared by every writer of `path` in this process,
+    so that parallel jobs never interleave writes to the same output file
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    with _file_locks_guard:
+        if key not in _file_locks:
+            _file_locks[key] = threading.RLock()
+        return _file_locks[key]
+
+
+@contextmanager
+def atomic_write(path, mode="w", suffix=".tmp"):
+    """
+    open a temporary file next to `path`, renamed to `path` once the block
+    completes and removed if the block raises, so that `path` is never left
+    partially written. The file keeps the permissions of the file it replaces,
+    or gets those of a new file
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=suffix)
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        try:
+            permissions = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            permissions = 0o666 & ~_umask
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, permissions)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def context_local():
+    """
+    return a threading.local holding per part state, its attributes are
+    carried over to the worker threads running functions wrapped by with_context()
+    """
+    local = threading.local()
+    _context_locals.append(local)
+    return local
+
+
+def with_context(function):
+    """
+    wrap `function` to run with the context_local() attributes of the calling
+    thread, whatever the thread it runs in (e.g. when submitted to an executor)
+    """
+    captured = [(local, dict(vars(local))) for local in _context_locals]
+
+    def run(*args, **kwargs):
+        saved = [(local, dict(vars(local))) for local in _context_locals]
+        for local, values in captured:
+            vars(local).update(values)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            for local, values in saved:
+                vars(local).clear()
+                vars(local).update(values)
+
+    return run
+
+
+def submit(function, *args, **kwargs):
+    """
+    run `function` in the background with the context of the calling thread,
+    return its Future. The functions run on a pool shared by the process, they
+    must not wait for other functions submitted here
+    """
+    global _executor
+
+    with _executor_guard:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix="stage")
+    return _executor.submit(with_context(function), *args, **kwargs)
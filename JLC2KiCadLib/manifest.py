@@ -0,0 +1,76 @@
+import atexit
+import json
+import logging
+import os
+import threading
+
+from .helper import atomic_write
+
+MANIFEST_FILENAME = ".jlc2kicad_manifest.json"
+
+_manifests = {}
+_manifests_guard = threading.Lock()
+
+
+class Manifest:
+    """
+    Record of the outputs generated for each JLCPCB part # in an output directory:
+    {component_id: {"footprint": "lib:name", "models": {"STEP": True, ...},
+                    "symbol_library": ..., "symbol": ...}}
+    It lets --skip_existing skip imported parts without any network request.
+    """
+
+    def __init__(self, output_dir):
+        self.filename = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.lock = threading.Lock()
+        self.modified = False
+        try:
+            with open(self.filename) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, component_id):
+        with self.lock:
+            return self.entries.get(component_id)
+
+    def update(self, component_id, **outputs):
+        with self.lock:
+            self.entries.setdefault(component_id, {}).update(outputs)
+            self.modified = True
+
+    def save(self):
+        with self.lock:
+            if not self.modified:
+                return
+            directory = os.path.dirname(self.filename)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with atomic_write(self.filename) as f:
+                    json.dump(self.entries, f, indent=1, sort_keys=True)
+            except OSError:
+                logging.warning(f"failed to write {self.filename}")
+                return
+            self.modified = False
+
+
+def get_manifest(output_dir):
+    """
+    Return the Manifest of `output_dir`, shared by the whole process
+    """
+
+    key = os.path.normcase(os.path.abspath(output_dir))
+    with _manifests_guard:
+        if key not in _manifests:
+            _manifests[key] = Manifest(output_dir)
+        return _manifests[key]
+
+
+def save_manifests():
+    with _manifests_guard:
+        manifests = list(_manifests.values())
+    for manifest in manifests:
+        manifest.save()
+
+
+atexit.register(save_manifests)
@@ -0,0 +1,175 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from .helper import context_local
+
+_context = context_local()
+
+
+class Stats:
+    """
+    Time spent in each span, network requests and bytes downloaded while
+    converting one part #
+    """
+
+    def __init__(self):
+        self.spans = {}  # name -> [count, seconds]
+        self.requests = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def add_span(self, name, seconds):
+        with self.lock:
+            span = self.spans.setdefault(name, [0, 0.0])
+            span[0] += 1
+            span[1] += seconds
+
+    def add_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def add_bytes(self, size):
+        with self.lock:
+            self.bytes += size
+
+    def merge(self, other):
+        with self.lock:
+            for name, (count, seconds) in other.spans.items():
+                span = self.spans.setdefault(name, [0, 0.0])
+                span[0] += count
+                span[1] += seconds
+            self.requests += other.requests
+            self.bytes += other.bytes
+
+    def to_dict(self):
+        return {
+            "spans": {
+                name: {"count": count, "seconds": seconds}
+                for name, (count, seconds) in self.spans.items()
+            },
+            "requests": self.requests,
+            "bytes": self.bytes,
+        }
+
+
+def current():
+    """
+    Return the Stats collected by the calling thread, if any
+    """
+
+    return getattr(_context, "stats", None)
+
+
+@contextmanager
+def collect(stats):
+    """
+    Record the spans, requests and bytes of the calling thread into `stats`
+    """
+
+    previous = current()
+    _context.stats = stats
+    try:
+        yield stats
+    finally:
+        _context.stats = previous
+
+
+@contextmanager
+def span(name):
+    """
+    Time the enclosed block as `name`. Spans may be nested, each one counts
+    the whole time of its block.
+    """
+
+    stats = current()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_span(name, time.perf_counter() - start)
+
+
+def count_request():
+    stats = current()
+    if stats is not None:
+        stats.add_request()
+
+
+def count_bytes(size):
+    stats = current()
+    if stats is not None:
+        stats.add_bytes(size)
+
+
+def report(results, wall_time):
+    """
+    Return the per part # and aggregate profile of converter results
+    """
+
+    total = Stats()
+    stages = {}
+    parts = []
+    for result in results:
+        total.merge(result.profile)
+        for stage, seconds in result.timings.items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+        parts.append(
+            dict(
+                result.profile.to_dict(),
+                component_id=result.component_id,
+                success=result.success,
+                duration=result.duration,
+                stages=result.timings,
+            )
+        )
+
+    return {
+        "wall_time": wall_time,
+        "parts": parts,
+        "aggregate": dict(
+            total.to_dict(),
+            parts=len(parts),
+            duration=sum(part["duration"] for part in parts),
+            stages=stages,
+        ),
+    }
+
+
+def write_report(profile, filename="-"):
+    """
+    Write the `profile` of report() as JSON to `filename`, or print it as a
+    table if `filename` is "-"
+    """
+
+    if filename != "-":
+        with open(filename, "w") as f:
+            json.dump(profile, f, indent=1)
+        return
+
+    out = sys.stdout
+    out.write(f"{'part #':<14}{'time':>9}{'requests':>10}{'kB':>10}  stages\n")
+    for part in sorted(profile["parts"], key=lambda part: -part["duration"]):
+        stages = " ".join(
+            f"{stage}={seconds:.2f}" for stage, seconds in part["stages"].items()
+        )
+        out.write(
+            f"{part['component_id']:<14}{part['duration']:>8.2f}s{part['requests']:>10}{part['bytes'] / 1024:>10.1f}  {stages}\n"
+        )
+
+    aggregate = profile["aggregate"]
+    out.write(
+        f"\n{aggregate['parts']} part(s) in {profile['wall_time']:.2f} s, {aggregate['requests']} request(s), {aggregate['bytes'] / 1024:.1f} kB downloaded\n"
+    )
+    out.write(f"{'span':<24}{'count':>8}{'total':>10}{'mean':>10}\n")
+    for name, span in sorted(
+        aggregate["spans"].items(), key=lambda item: -item[1]["seconds"]
+    ):
+        out.write(
+            f"{name:<24}{span['count']:>8}{span['seconds']:>9.2f}s{span['seconds'] / span['count'] * 1000:>8.1f}ms\n"
+        )
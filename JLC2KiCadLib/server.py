@@ -0,0 +1,156 @@
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .__version__ import __version__
+from . import helper
+from .JLC2KiCadLib import get_parser as get_conversion_parser
+from .converter import Converter
+
+
+class ConversionService:
+    """
+    Convert the part # requested by concurrent clients with a single Converter.
+    A part # requested while it is already being converted waits for the
+    running conversion instead of starting a second one.
+    """
+
+    def __init__(self, converter):
+        self.converter = converter
+        self.in_flight = {}  # component_id -> Future of its Result
+        self.lock = threading.Lock()
+
+    def convert(self, part_ids):
+        owned = []
+        futures = []
+        with self.lock:
+            for component_id in dict.fromkeys(part_ids):
+                future = self.in_flight.get(component_id)
+                if future is None:
+                    future = self.in_flight[component_id] = Future()
+                    owned.append(component_id)
+                futures.append(future)
+
+        if owned:
+            try:
+                results = self.converter.convert(owned)
+            except BaseException as e:
+                self.finish(owned, exception=e)
+                raise
+            self.finish(owned, results)
+
+        return [future.result() for future in futures]
+
+    def finish(self, owned, results=(), exception=None):
+        with self.lock:
+            futures = [self.in_flight.pop(component_id) for component_id in owned]
+        for future, result in zip(futures, results):
+            future.set_result(result)
+        if exception is not None:
+            for future in futures[len(results) :]:
+                future.set_exception(exception)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health   -> {"status": "ok", "version": ...}
+    POST /convert  <- {"parts": ["C1337258", ...]} or ["C1337258", ...]
+                   -> {"results": [Result.to_dict(), ...]}
+    """
+
+    server_version = f"JLC2KiCadLib/{__version__}"
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self.send_json(200, {"status": "ok", "version": __version__})
+        else:
+            self.send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/convert":
+            self.send_json(404, {"error": f"unknown path {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self.send_json(400, {"error": "the request body is not valid JSON"})
+            return
+        part_ids = body.get("parts") if isinstance(body, dict) else body
+        if not isinstance(part_ids, list) or not all(
+            isinstance(part_id, str) and part_id.strip() for part_id in part_ids
+        ):
+            self.send_json(400, {"error": 'expected {"parts": [JLCPCB part #, ...]}'})
+            return
+
+        try:
+            results = self.server.service.convert(
+                part_id.strip() for part_id in part_ids
+            )
+        except Exception as e:
+            logging.exception("conversion request failed")
+            self.send_json(500, {"error": str(e) or type(e).__name__})
+            return
+        self.send_json(200, {"results": [result.to_dict() for result in results]})
+
+    def send_json(self, status, content):
+        data = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+
+def get_parser():
+    parser = get_conversion_parser()
+    parser.prog = f"{parser.prog} serve"
+    parser.description = "run a local HTTP server converting the JLCPCB part # it receives, with the conversion options below"
+    parser.epilog = 'example use : \n	JLC2KiCadLib serve -dir My_lib -jobs 4 --skip_existing\n	curl -d \'{"parts": ["C1337258"]}\' http://127.0.0.1:8087/convert'
+
+    parser.add_argument(
+        "-host",
+        dest="host",
+        type=str,
+        default="127.0.0.1",
+        help='Address the server listens on, default is "127.0.0.1"',
+    )
+
+    parser.add_argument(
+        "-port",
+        dest="port",
+        type=int,
+        default=8087,
+        help="Port the server listens on, default is 8087",
+    )
+
+    return parser
+
+
+def main(argv=None):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error("-jobs must be at least 1")
+    if args.components or args.bom:
+        parser.error("part # are sent to the server, not given on the command line")
+
+    helper.set_logging(args.logging_level, args.log_file)
+
+    server = ThreadingHTTPServer((args.host, args.port), RequestHandler)
+    server.daemon_threads = True
+    server.service = ConversionService(Converter(args))
+    logging.info(f"serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,197 @@
+import atexit
+import logging
+import os
+import re
+import threading
+
+from ..helper import atomic_write, file_lock
+
+template_lib_header = f"""\
+(kicad_symbol_lib (version 20210201) (generator TousstNicolas/JLC2KiCad_lib)
+"""
+
+template_lib_footer = ")\n"
+
+# a top level symbol starts with an indented "(symbol "name"" line and ends with
+# the first line holding only a closing parenthesis at the same indentation
+symbol_start_pattern = re.compile(rb'([ \t]+)\(symbol "((?:[^"\\]|\\.)*)"')
+
+_libraries = {}
+_libraries_guard = threading.Lock()
+
+
+class SymbolLibrary:
+    """
+    Index of the top level symbols of a .kicad_sym file (name -> byte range).
+
+    New symbols are appended right away before the library footer, which only
+    writes the new symbol. Replacements of existing symbols are kept in memory
+    and applied by flush() in a single rewrite of the file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = file_lock(filename)
+        self.index = {}
+        self.footer_offset = 0
+        self.replacements = {}
+        self.stat = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.filename):
+            with open(self.filename, "w") as f:
+                logging.info(f"writing in {self.filename} file")
+                f.write(template_lib_header)
+                f.write(template_lib_footer)
+
+        with open(self.filename, "rb") as f:
+            content = f.read()
+
+        self.index = {}
+        offset = 0
+        start = name = end_line = None
+        for line in content.splitlines(keepends=True):
+            if start is None:
+                match = symbol_start_pattern.match(line)
+                if match:
+                    start = offset
+                    name = match.group(2).decode()
+                    end_line = match.group(1) + b")"
+            elif line.rstrip(b"\r\n") == end_line:
+                self.index[name] = (start, offset + len(line))
+                start = None
+            offset += len(line)
+
+        self.footer_offset = content.rfind(b")")
+        if self.footer_offset < 0:
+            self.footer_offset = len(content)
+        self.stat = self.file_stat()
+
+    def file_stat(self):
+        stat = os.stat(self.filename)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def refresh(self):
+        # reload the index if the file was modified by someone else
+        try:
+            if self.file_stat() == self.stat:
+                return
+        except OSError:
+            pass
+        if self.replacements:
+            logging.warning(
+                f"{self.filename} was modified by another program, pending symbol updates are applied on the new content"
+            )
+        self.load()
+
+    def __contains__(self, name):
+        with self.lock:
+            self.refresh()
+            return name in self.index
+
+    def add(self, name, template):
+        """
+        Add the symbol `name`, or replace it if already in the library.
+        `template` is the text of the symbol, a str or a SymbolWriter
+        """
+
+        with self.lock:
+            self.refresh()
+            if name in self.index:
+                self.replacements[name] = template
+                return
+
+            data = template.encode()
+            with open(self.filename, "rb+") as lib_file:
+                # move before the library footer and write the component template
+                # see https://github.com/TousstNicolas/JLC2KiCad_lib/issues/46
+                lib_file.seek(self.footer_offset)
+                lib_file.write(data)
+                lib_file.write(template_lib_footer.encode())
+                lib_file.truncate()
+            self.index[name] = (self.footer_offset, self.footer_offset + len(data))
+            self.footer_offset += len(data)
+            self.stat = self.file_stat()
+
+    def flush(self):
+        """
+        Apply the pending replacements in a single atomic rewrite of the file
+        """
+
+        with self.lock:
+            if not self.replacements:
+                return
+            self.refresh()
+
+            with open(self.filename, "rb") as f:
+                content = f.read()
+
+            index = {}
+            position = 0  # position in the old content
+            written = 0  # position in the new content
+            with atomic_write(self.filename, "wb") as f:
+                for name, (start, end) in sorted(
+                    self.index.items(), key=lambda item: item[1]
+                ):
+                    f.write(content[position:start])
+                    written += start - position
+                    if name in self.replacements:
+                        data = self.replacements[name].encode()
+                    else:
+                        data = content[start:end]
+                    f.write(data)
+                    index[name] = (written, written + len(data))
+                    written += len(data)
+                    position = end
+
+                # the symbols removed from the file since they were replaced
+                # (see refresh()) are added again before the library footer
+                footer_offset = max(self.footer_offset, position)
+                f.write(content[position:footer_offset])
+                written += footer_offset - position
+                for name, template in self.replacements.items():
+                    if name in index:
+                        continue
+                    logging.warning(
+                        f"symbol {name} was removed from {self.filename} by another program, adding it again"
+                    )
+                    data = template.encode()
+                    f.write(data)
+                    index[name] = (written, written + len(data))
+                    written += len(data)
+                f.write(content[footer_offset:])
+
+            logging.info(
+                f"updated {len(self.replacements)} symbol(s) in {self.filename}"
+            )
+            self.index = index
+            self.footer_offset = written
+            self.replacements = {}
+            self.stat = self.file_stat()
+
+
+def get_library(filename):
+    """
+    Return the SymbolLibrary of `filename`, shared by the whole process
+    """
+
+    key = os.path.normcase(os.path.abspath(filename))
+    with _libraries_guard:
+        if key not in _libraries:
+            _libraries[key] = SymbolLibrary(filename)
+        return _libraries[key]
+
+
+def flush_libraries():
+    """
+    Write the pending symbol replacements of every opened library
+    """
+
+    with _libraries_guard:
+        libraries = list(_libraries.values())
+    for library in libraries:
+        library.flush()
+
+
+atexit.register(flush_libraries)
@@ -1,18 +1,13 @@
-import requests
-import json
-import re
 import os
 import logging
 
 from .symbol_handlers import *
+from .library import get_library
+from .symbol_writer import SymbolWriter, quote, sexpr
+from .. import client
+from .. import profiling
 
 
-template_lib_header = f"""\
-(kicad_symbol_lib (version 20210201) (generator TousstNicolas/JLC2KiCad_lib)
-"""
-
-template_lib_footer = ")\n"
-
 supported_value_types = [
     "Resistance",
     "Capacitance",
@@ -32,22 +27,21 @@ def create_symbol(
     skip_existing,
 ):
     class kicad_symbol:
-        drawing = ""
+        # units of the symbol, written by the handlers
+        drawing = SymbolWriter(depth=2)
         pinNamesHide = "(pin_names hide)"
         pinNumbersHide = "(pin_numbers hide)"
 
     kicad_symbol = kicad_symbol()
 
+    # the documents of all the units are fetched at once, then drawn in order
+    documents = client.get_components(symbol_component_uuid)
+    if any(data is None for data in documents):
+        logging.error("create_symbol error. Could not retrieve the component")
+        return ()
+
     ComponentName = ""
-    for component_uuid in symbol_component_uuid:
-        response = requests.get(f"https://easyeda.com/api/components/{component_uuid}")
-        if response.status_code == requests.codes.ok:
-            data = json.loads(response.content.decode())
-        else:
-            logging.error(
-                f"create_symbol error. Requests returned with error code {response.status_code}"
-            )
-            return ()
+    for component_uuid, data in zip(symbol_component_uuid, documents):
 
         symbol_shape = data["result"]["dataStr"]["shape"]
         symmbolic_prefix = data["result"]["packageDetail"]["dataStr"]["head"]["c_para"][
@@ -88,11 +82,9 @@ def create_symbol(
         if not library_name:
             library_name = ComponentName
 
-        filename = f"{output_dir}/{symbol_path}/{library_name}.kicad_sym"
-
         logging.info(f"Creating symbol {component_title} in {library_name}")
 
-        kicad_symbol.drawing += f'''\n    (symbol "{component_title}_1"'''
+        kicad_symbol.drawing.open("symbol", quote(f"{component_title}_1"))
 
         for line in symbol_shape:
             args = [
@@ -111,49 +103,40 @@ def create_symbol(
                     ),
                     kicad_symbol=kicad_symbol,
                 )
-        kicad_symbol.drawing += """\n    )"""
-
-    template_lib_component = f"""\
-  (symbol "{ComponentName}" {kicad_symbol.pinNamesHide} {kicad_symbol.pinNumbersHide} (in_bom yes) (on_board yes)
-    (property "Reference" "{symmbolic_prefix}" (id 0) (at 0 1.27 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Value" "{ComponentName}" (id 1) (at 0 -2.54 0)
-      (effects (font (size 1.27 1.27)))
-    )
-    (property "Footprint" "{footprint_name}" (id 2) (at 0 -10.16 0)
-      (effects (font (size 1.27 1.27) italic) hide)
+        kicad_symbol.drawing.close()
+
+    # the pin names and numbers visibility is only known once the pins are drawn
+    template_lib_component = SymbolWriter(depth=1)
+    template_lib_component.open(
+        "symbol",
+        quote(ComponentName),
+        *filter(None, (kicad_symbol.pinNamesHide, kicad_symbol.pinNumbersHide)),
+        sexpr("in_bom", "yes"),
+        sexpr("on_board", "yes"),
     )
-    (property "Datasheet" "{datasheet_link}" (id 3) (at -2.286 0.127 0)
-      (effects (font (size 1.27 1.27)) (justify left) hide)
+    template_lib_component.property("Reference", symmbolic_prefix, 0, at=(0, 1.27, 0))
+    template_lib_component.property("Value", ComponentName, 1, at=(0, -2.54, 0))
+    template_lib_component.property(
+        "Footprint", footprint_name, 2, at=(0, -10.16, 0), italic=True, hide=True
     )
-    (property "ki_keywords" "{component_id}" (id 4) (at 0 0 0)
-      (effects (font (size 1.27 1.27)) hide)
+    template_lib_component.property(
+        "Datasheet",
+        datasheet_link,
+        3,
+        at=(-2.286, 0.127, 0),
+        justify="left",
+        hide=True,
     )
-    (property "LCSC" "{component_id}" (id 5) (at 0 0 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )
-    {get_type_values_properties(6, component_types_values)}{kicad_symbol.drawing}
-  )
-"""
+    template_lib_component.property("ki_keywords", component_id, 4, hide=True)
+    template_lib_component.property("LCSC", component_id, 5, hide=True)
+    for index, (value_type, value) in enumerate(component_types_values):
+        template_lib_component.property(value_type, value, 6 + index, hide=True)
+    template_lib_component.extend(kicad_symbol.drawing)
+    template_lib_component.close()
 
-    if not os.path.exists(f"{output_dir}/{symbol_path}"):
-        os.makedirs(f"{output_dir}/{symbol_path}")
+    os.makedirs(f"{output_dir}/{symbol_path}", exist_ok=True)
 
-    if os.path.exists(filename):
-        update_library(
-            library_name,
-            symbol_path,
-            ComponentName,
-            template_lib_component,
-            output_dir,
-            skip_existing,
-        )
-    else:
-        with open(filename, "w") as f:
-            logging.info(f"writing in {filename} file")
-            f.write(template_lib_header)
-            f.write(template_lib_footer)
+    with profiling.span("symbol library"):
         update_library(
             library_name,
             symbol_path,
@@ -163,16 +146,8 @@ def create_symbol(
             skip_existing,
         )
 
-
-def get_type_values_properties(start_index, component_types_values):
-    return "\n".join(
-        [
-            f"""(property "{type_value[0]}" "{type_value[1]}" (id {start_index + index}) (at 0 0 0)
-      (effects (font (size 1.27 1.27)) hide)
-    )"""
-            for index, type_value in enumerate(component_types_values)
-        ]
-    )
+    # return the library and symbol names to be recorded in the manifest
+    return library_name, ComponentName
 
 
 def update_library(
@@ -190,37 +165,18 @@ def update_library(
     the component will be added at the end
     """
 
-    with open(
-        f"{output_dir}/{symbol_path}/{library_name}.kicad_sym", "rb+"
-    ) as lib_file:
-        pattern = f'  \(symbol "{component_title}" (\n|.)*?\n  \)'
-        file_content = lib_file.read().decode()
+    library = get_library(f"{output_dir}/{symbol_path}/{library_name}.kicad_sym")
 
-        if f'symbol "{component_title}"' in file_content:
+    # several jobs may add components to the same library at once
+    with library.lock:
+        if component_title in library:
             if skip_existing:
                 logging.info(
                     f"component {component_title} already in symbols library, skipping"
                 )
                 return
-            # use regex to find the old component template in the file and replace it with the new one
+            # the replacement is written by flush_libraries() at the end of the run
             logging.info(
                 f"found component already in {library_name}, updating {library_name}"
             )
-            sub = re.sub(
-                pattern=pattern,
-                repl=template_lib_component,
-                string=file_content,
-                flags=re.DOTALL,
-                count=1,
-            )
-            lib_file.seek(0)
-            # delete the file content and rewrite it
-            lib_file.truncate()
-            lib_file.write(sub.encode())
-        else:
-            # move before the library footer and write the component template
-            # see https://github.com/TousstNicolas/JLC2KiCad_lib/issues/46
-            new_content = file_content[: file_content.rfind(")")]
-            new_content = new_content + template_lib_component + template_lib_footer
-            lib_file.seek(0)
-            lib_file.write(new_content.encode())
+        library.add(component_title, template_lib_component)
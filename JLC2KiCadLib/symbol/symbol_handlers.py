@@ -34,13 +34,7 @@ def h_R(data, translation, kicad_symbol):
         X2 = mil2mm(X2 - translation[0])
         Y2 = -mil2mm(Y2 - translation[1])
 
-        kicad_symbol.drawing += f"""
-      (rectangle
-        (start {X1} {Y1})
-        (end {X2} {Y2})
-        (stroke (width 0) (type default) (color 0 0 0 0))
-        (fill (type background))
-      )"""
+        kicad_symbol.drawing.rectangle(start=(X1, Y1), end=(X2, Y2))
     except Exception as e:
         print(e)
         logging.error("symbol : failed to add a rectangle")
@@ -56,13 +50,7 @@ def h_E(data, translation, kicad_symbol):
         Y1 = -mil2mm(float(data[1]) - translation[1])
         radius = mil2mm(float(data[2]))
 
-        kicad_symbol.drawing += f"""
-      (circle
-        (center {X1} {Y1})
-        (radius {radius})
-        (stroke (width 0) (type default) (color 0 0 0 0))
-        (fill (type background))
-      )"""
+        kicad_symbol.drawing.circle(center=(X1, Y1), radius=radius)
     except Exception as e:
         print(e)
         logging.error("symbol : failed to add circle")
@@ -132,13 +120,15 @@ def h_P(data, translation, kicad_symbol):
         nameSize = 1
         numberSize = 1
 
-    kicad_symbol.drawing += f"""
-      (pin {electrical_type} line
-        (at {X} {Y} {rotation})
-        (length {length})
-        (name "{pinName}" (effects (font (size {nameSize} {nameSize}))))
-        (number "{pinNumber}" (effects (font (size {numberSize} {numberSize}))))
-      )"""
+    kicad_symbol.drawing.pin(
+        electrical_type,
+        at=(X, Y, rotation),
+        length=length,
+        name=pinName,
+        number=pinNumber,
+        name_size=nameSize,
+        number_size=numberSize,
+    )
 
 
 def h_T(data, translation, kicad_symbol):
@@ -154,12 +144,7 @@ def h_T(data, translation, kicad_symbol):
         fontSize = mil2mm(float(data[6].replace("pt", "")))
 
         text = data[10]
-        kicad_symbol.drawing += f"""
-      (text
-        "{text}"
-        (at {X} {Y} {angle})
-        (effects (font (size {fontSize} {fontSize})))
-      )"""
+        kicad_symbol.drawing.text(text, at=(X, Y, angle), size=fontSize)
     except Exception:
         logging.error("failed to add text to symbol")
 
@@ -171,21 +156,15 @@ def h_PL(data, translation, kicad_symbol):
 
     try:
         pathString = data[0].split(" ")
-        polypts = []
-        for i, _ in enumerate(pathString[::2]):
-            polypts.append(
-                f"(xy {mil2mm(float(pathString[2*i]) - translation[0])} {- mil2mm(float(pathString[2*i+1]) - translation[-1])})"
+        polypts = [
+            (
+                mil2mm(float(pathString[2 * i]) - translation[0]),
+                -mil2mm(float(pathString[2 * i + 1]) - translation[-1]),
             )
-        polystr = "\n          ".join(polypts)
+            for i in range(len(pathString[::2]))
+        ]
 
-        kicad_symbol.drawing += f"""
-      (polyline
-        (pts
-          {polystr}
-        )
-        (stroke (width 0) (type default) (color 0 0 0 0))
-        (fill (type none))
-      )"""
+        kicad_symbol.drawing.polyline(polypts, fill="none")
     except Exception:
         logging.error("symbol : failed to add a polygone")
 
@@ -197,22 +176,16 @@ def h_PG(data, translation, kicad_symbol):
 
     try:
         pathString = [i for i in data[0].split(" ") if i]
-        polypts = []
-        for i, _ in enumerate(pathString[::2]):
-            polypts.append(
-                f"(xy {mil2mm(float(pathString[2*i]) - translation[0])} {- mil2mm(float(pathString[2*i+1]) - translation[1])})"
+        polypts = [
+            (
+                mil2mm(float(pathString[2 * i]) - translation[0]),
+                -mil2mm(float(pathString[2 * i + 1]) - translation[1]),
             )
+            for i in range(len(pathString[::2]))
+        ]
         polypts.append(polypts[0])
-        polystr = "\n          ".join(polypts)
 
-        kicad_symbol.drawing += f"""
-      (polyline
-        (pts
-          {polystr}
-        )
-        (stroke (width 0) (type default) (color 0 0 0 0))
-        (fill (type background))
-      )"""
+        kicad_symbol.drawing.polyline(polypts, fill="background")
     except Exception:
         logging.error("symbol : failed to add a polygone")
 
@@ -320,14 +293,9 @@ def h_A(data, translation, kicad_symbol):
         Xmid = mil2mm(Xmid - translation[0])
         Ymid = -mil2mm(Ymid - translation[1])
 
-        kicad_symbol.drawing += f"""
-      (arc
-        (start {Xstart} {Ystart})
-        (mid {Xmid} {Ymid})
-        (end {Xend} {Yend})
-        (stroke (width 0) (type default) (color 0 0 0 0))
-        (fill (type none))
-      )"""
+        kicad_symbol.drawing.arc(
+            start=(Xstart, Ystart), mid=(Xmid, Ymid), end=(Xend, Yend)
+        )
     except Exception:
         logging.error("symbol : failed to add an arc")
 
@@ -0,0 +1,145 @@
+def quote(text):
+    """
+    Return `text` as an S-expression string
+    """
+
+    return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def sexpr(*atoms):
+    """
+    Return the S-expression (atom atom ...) on a single line
+    """
+
+    return "(" + " ".join(map(str, atoms)) + ")"
+
+
+class SExprWriter:
+    """
+    Buffered writer of an indented S-expression, one node per line.
+
+    The text is kept as a list of chunks, joined once by getvalue() or
+    encode(), so that building a symbol is linear in its size whatever its
+    number of nodes. encode() lets a writer be given to SymbolLibrary.add()
+    as the template of a symbol.
+    """
+
+    indent = "  "
+
+    def __init__(self, depth=0):
+        self.chunks = []
+        self.depth = depth
+
+    def open(self, *atoms):
+        """
+        Start a node holding the nodes written until the matching close()
+        """
+
+        self.chunks.append(f"{self.indent * self.depth}({' '.join(map(str, atoms))}\n")
+        self.depth += 1
+
+    def close(self):
+        self.depth -= 1
+        self.chunks.append(f"{self.indent * self.depth})\n")
+
+    def node(self, *atoms):
+        """
+        Write a node on a single line
+        """
+
+        self.chunks.append(f"{self.indent * self.depth}{sexpr(*atoms)}\n")
+
+    def extend(self, writer):
+        """
+        Append the nodes of another writer, written at the same depth
+        """
+
+        self.chunks.extend(writer.chunks)
+
+    def getvalue(self):
+        return "".join(self.chunks)
+
+    def encode(self, encoding="utf-8"):
+        return self.getvalue().encode(encoding)
+
+
+class SymbolWriter(SExprWriter):
+    """
+    SExprWriter with a method per node type of a KiCad symbol
+    """
+
+    def property(
+        self, key, value, index, at=(0, 0, 0), italic=False, justify=None, hide=False
+    ):
+        font = ["font", sexpr("size", 1.27, 1.27)]
+        if italic:
+            font.append("italic")
+        effects = ["effects", sexpr(*font)]
+        if justify:
+            effects.append(sexpr("justify", justify))
+        if hide:
+            effects.append("hide")
+
+        self.open(
+            "property", quote(key), quote(value), sexpr("id", index), sexpr("at", *at)
+        )
+        self.node(*effects)
+        self.close()
+
+    def pin(self, electrical_type, at, length, name, number, name_size, number_size):
+        self.open("pin", electrical_type, "line")
+        self.node("at", *at)
+        self.node("length", length)
+        self.node("name", quote(name), font_effects(name_size))
+        self.node("number", quote(number), font_effects(number_size))
+        self.close()
+
+    def rectangle(self, start, end, fill="background"):
+        self.open("rectangle")
+        self.node("start", *start)
+        self.node("end", *end)
+        self.stroke_fill(fill)
+        self.close()
+
+    def circle(self, center, radius, fill="background"):
+        self.open("circle")
+        self.node("center", *center)
+        self.node("radius", radius)
+        self.stroke_fill(fill)
+        self.close()
+
+    def arc(self, start, mid, end, fill="none"):
+        self.open("arc")
+        self.node("start", *start)
+        self.node("mid", *mid)
+        self.node("end", *end)
+        self.stroke_fill(fill)
+        self.close()
+
+    def polyline(self, points, fill="none"):
+        self.open("polyline")
+        self.open("pts")
+        for x, y in points:
+            self.node("xy", x, y)
+        self.close()
+        self.stroke_fill(fill)
+        self.close()
+
+    def text(self, text, at, size):
+        self.open("text", quote(text))
+        self.node("at", *at)
+        self.node("effects", sexpr("font", sexpr("size", size, size)))
+        self.close()
+
+    def stroke_fill(self, fill):
+        self.node(
+            "stroke",
+            sexpr("width", 0),
+            sexpr("type", "default"),
+            sexpr("color", 0, 0, 0, 0),
+        )
+        self.node("fill", sexpr("type", fill))
+
+
+def font_effects(size):
+    return sexpr("effects", sexpr("font", sexpr("size", size, size)))
@@ -0,0 +1,210 @@
+"""
+Throughput benchmarks of the conversion stages, replayed offline from the
+synthetic EasyEDA corpus of fixtures.py.
+
+    python benchmarks/bench.py [-rounds N] [-only NAME] [-json FILE]
+                               [-compare FILE] [-threshold RATIO]
+
+Save a baseline with -json, then run again with -compare to fail when a
+benchmark gets slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures
+import replay
+from JLC2KiCadLib import cache, client
+from JLC2KiCadLib.footprint.footprint import create_footprint
+from JLC2KiCadLib.footprint import model_queue
+from JLC2KiCadLib.footprint.footprint_context import FootprintContext
+from JLC2KiCadLib.footprint.model3d import get_WrlModel
+from JLC2KiCadLib.symbol.library import flush_libraries
+from JLC2KiCadLib.symbol.symbol import create_symbol, update_library
+from KicadModTree import Footprint
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+
+@benchmark("create_footprint")
+def bench_create_footprint(part, output_dir):
+    create_footprint(
+        footprint_component_uuid=part.footprint_uuid,
+        component_id=part.component_id,
+        footprint_lib="footprint",
+        output_dir=output_dir,
+        model_base_variable="",
+        model_dir="packages3d",
+        skip_existing=False,
+        models=[],
+    )
+
+
+@benchmark("create_symbol")
+def bench_create_symbol(part, output_dir):
+    create_symbol(
+        symbol_component_uuid=part.symbol_uuids,
+        footprint_name=f"footprint:{part.name}",
+        datasheet_link="",
+        library_name="bench",
+        symbol_path="symbol",
+        output_dir=output_dir,
+        component_id=part.component_id,
+        skip_existing=False,
+    )
+    flush_libraries()
+
+
+@benchmark("get_WrlModel")
+def bench_get_WrlModel(part, output_dir):
+    footprint_info = FootprintContext(
+        footprint_name=part.name,
+        output_dir=output_dir,
+        footprint_lib="footprint",
+        model_base_variable="",
+        model_dir="packages3d",
+        origin=fixtures.ORIGIN,
+        models=["WRL"],
+        skip_existing=False,
+    )
+    get_WrlModel(
+        component_uuid=part.model_uuid,
+        footprint_info=footprint_info,
+        kicad_mod=Footprint(part.name),
+        translationX=fixtures.ORIGIN[0],
+        translationY=fixtures.ORIGIN[1],
+        translationZ="0",
+        rotation="0,0,0",
+    )
+    model_queue.wait()
+
+
+@benchmark("update_library")
+def bench_update_library(part, output_dir, symbols=100):
+    # add `symbols` symbols of the size of the part one, then replace them all
+    pins = "".join(
+        f"""
+      (pin unspecified line
+        (at 0 {index * 2.54} 0)
+        (length 2.54)
+        (name "IO{index}" (effects (font (size 1 1))))
+        (number "{index}" (effects (font (size 1 1))))
+      )"""
+        for index in range(part.pins)
+    )
+    os.makedirs(os.path.join(output_dir, "symbol"), exist_ok=True)
+    for _ in range(2):
+        for index in range(symbols):
+            name = f"{part.name}_{index}"
+            update_library(
+                "bench",
+                "symbol",
+                name,
+                f'  (symbol "{name}" (in_bom yes) (on_board yes)\n    (symbol "{name}_1"{pins}\n    )\n  )\n',
+                output_dir,
+                False,
+            )
+    flush_libraries()
+
+
+def run(function, part, rounds, directory):
+    timings = []
+    for index in range(rounds):
+        output_dir = os.path.join(directory, f"{function.__name__}_{part.name}_{index}")
+        # parse the component documents again in each round
+        client.clear_components()
+        start = time.perf_counter()
+        function(part, output_dir)
+        timings.append(time.perf_counter() - start)
+    return {"median": statistics.median(timings), "min": min(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-rounds", type=int, default=5, help="Rounds per benchmark, default is 5"
+    )
+    parser.add_argument(
+        "-only",
+        type=str,
+        default="",
+        help="Only run the benchmarks whose name contains ONLY",
+    )
+    parser.add_argument(
+        "-json", type=str, default=None, help="Write the results as JSON into FILE"
+    )
+    parser.add_argument(
+        "-compare",
+        type=str,
+        default=None,
+        help="Compare the medians to the JSON results of FILE",
+    )
+    parser.add_argument(
+        "-threshold",
+        type=float,
+        default=1.25,
+        help="Slowdown ratio reported as a regression, default is 1.25",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    cache.configure(enabled=False)
+    client.configure(retries=0)
+    adapter = replay.install(fixtures.responses())
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for function_name, function in BENCHMARKS.items():
+            for part in fixtures.CORPUS:
+                name = f"{function_name}[{part.name}]"
+                if args.only not in name:
+                    continue
+                results[name] = result = run(function, part, args.rounds, directory)
+                print(
+                    f"{name:<34}median {result['median'] * 1000:9.2f} ms  "
+                    f"min {result['min'] * 1000:9.2f} ms  "
+                    f"{1 / result['median']:8.1f} /s"
+                )
+    print(f"{adapter.requests} replayed requests")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = [
+            name
+            for name, result in results.items()
+            if name in baseline
+            and result["median"] > baseline[name]["median"] * args.threshold
+        ]
+        for name in regressions:
+            print(
+                f"REGRESSION {name}: {results[name]['median'] * 1000:.2f} ms, "
+                f"baseline {baseline[name]['median'] * 1000:.2f} ms"
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""
+Synthetic EasyEDA responses for the benchmarks.
+
+The documents follow the format of the recorded easyeda.com answers (products
+svgs, component documents, STEP and OBJ models) and are generated with a fixed
+seed, so every run converts the same corpus without any network access:
+
+    passive    0603 resistor, 2 pads, small mesh
+    qfn        QFN-32 with exposed pad
+    bga        BGA-256, symbol split in 4 units
+    connector  2x20 pin THT header with a huge mesh
+"""
+
+import json
+import random
+
+# path of each endpoint, relative to client.EASYEDA_URL or client.MODULES_URL
+PRODUCT_PATH = "/api/products/{}/svgs"
+COMPONENT_PATH = "/api/components/{}"
+STEP_PATH = "/qAxj6KHrDKw4blvCG8QJPs7Y/{}"
+OBJ_PATH = "/analyzer/api/3dmodel/{}"
+
+ORIGIN = (4000, 3000)  # footprint and symbol origin, in mil
+
+
+class Part:
+    """
+    One part # of the corpus and the documents served for it
+    """
+
+    def __init__(
+        self, name, component_id, pads, symbol_units, pins, vertices, model_uuid=None
+    ):
+        self.name = name
+        self.component_id = component_id
+        self.footprint_uuid = f"fp{component_id.lower()}"
+        self.symbol_uuids = [
+            f"sym{component_id.lower()}u{unit}" for unit in range(symbol_units)
+        ]
+        self.model_uuid = model_uuid or f"model{component_id.lower()}"
+        self.pads = pads
+        self.pins = pins
+        self.vertices = vertices
+
+    def copy(self, component_id):
+        """
+        Return the same part under another part #, sharing its 3D model
+        """
+
+        return Part(
+            self.name,
+            component_id,
+            self.pads,
+            len(self.symbol_uuids),
+            self.pins,
+            self.vertices,
+            self.model_uuid,
+        )
+
+
+CORPUS = [
+    Part("passive", "C25804", pads="passive", symbol_units=1, pins=2, vertices=400),
+    Part("qfn", "C91089", pads="qfn", symbol_units=1, pins=33, vertices=6000),
+    # a multi unit symbol: the first document names the part, then one per unit
+    Part("bga", "C1337258", pads="bga", symbol_units=5, pins=64, vertices=30000),
+    Part(
+        "connector", "C2977589", pads="header", symbol_units=1, pins=40, vertices=250000
+    ),
+]
+
+
+def corpus(copies=0):
+    """
+    Return CORPUS followed by `copies` copies of each of its parts under new
+    part # (C9000000, C9000001 ...), to load test with many parts
+    """
+
+    parts = list(CORPUS)
+    for index in range(copies * len(CORPUS)):
+        parts.append(CORPUS[index % len(CORPUS)].copy(f"C{9000000 + index}"))
+    return parts
+
+
+def pad_line(shape, x, y, width, height, layer, number, drill=0, rotation=0):
+    # EasyEDA gives no outline for round pads
+    points = (
+        ""
+        if shape == "ELLIPSE"
+        else " ".join(
+            f"{x + dx:.3f} {y + dy:.3f}"
+            for dx, dy in (
+                (-width / 2, -height / 2),
+                (width / 2, -height / 2),
+                (width / 2, height / 2),
+                (-width / 2, height / 2),
+            )
+        )
+    )
+    return f"PAD~{shape}~{x:.3f}~{y:.3f}~{width}~{height}~{layer}~~{number}~{drill}~{points}~{rotation}~gge{number}~0~~Y~0~~~{x:.3f},{y:.3f}"
+
+
+def track_line(points, width=0.6, layer=3):
+    return f"TRACK~{width}~{layer}~~{' '.join(f'{p:.3f}' for p in points)}~gge0~0"
+
+
+def outline(x, y, half_width, half_height):
+    return [
+        track_line(
+            [
+                x - half_width,
+                y - half_height,
+                x + half_width,
+                y - half_height,
+                x + half_width,
+                y + half_height,
+                x - half_width,
+                y + half_height,
+                x - half_width,
+                y - half_height,
+            ]
+        ),
+        track_line(
+            [x - half_width, y - half_height, x + half_width, y - half_height],
+            layer=12,
+        ),
+    ]
+
+
+def footprint_shape(part):
+    x, y = ORIGIN
+    shape = []
+    if part.pads == "passive":
+        shape += [
+            pad_line("RECT", x - 30, y, 35, 40, 1, 1),
+            pad_line("RECT", x + 30, y, 35, 40, 1, 2),
+        ]
+        shape += outline(x, y, 60, 30)
+    elif part.pads == "qfn":
+        number = 1
+        for side in range(4):
+            for index in range(8):
+                offset = (index - 3.5) * 19.7
+                px, py = [
+                    (x - 78, y + offset),
+                    (x + offset, y + 78),
+                    (x + 78, y - offset),
+                    (x - offset, y - 78),
+                ][side]
+                width, height = (30, 10) if side % 2 == 0 else (10, 30)
+                shape.append(pad_line("RECT", px, py, width, height, 1, number))
+                number += 1
+        shape.append(pad_line("RECT", x, y, 130, 130, 1, number))
+        shape += outline(x, y, 100, 100)
+        shape.append(f"CIRCLE~{x - 110}~{y - 110}~4~2~3~gge1~0~~")
+    elif part.pads == "bga":
+        for row in range(16):
+            for column in range(16):
+                shape.append(
+                    pad_line(
+                        "ELLIPSE",
+                        x + (column - 7.5) * 31.5,
+                        y + (row - 7.5) * 31.5,
+                        16,
+                        16,
+                        1,
+                        f"{'ABCDEFGHJKLMNPRT'[row]}{column + 1}",
+                    )
+                )
+        shape += outline(x, y, 276, 276)
+        shape.append(
+            f"ARC~1~3~~M {x - 290} {y - 250} A 40 40 0 0 1 {x - 250} {y - 290}~~gge2~0"
+        )
+    elif part.pads == "header":
+        for index in range(40):
+            px = x + (index // 2 - 9.5) * 100
+            py = y + (index % 2 - 0.5) * 100
+            shape.append(pad_line("OVAL", px, py, 66, 66, 11, index + 1, drill=20))
+        shape += outline(x, y, 1010, 110)
+        for index in range(20):
+            px = x + (index - 9.5) * 100
+            shape.append(
+                f"ARC~1~3~~M {px - 40} {y + 105} A 45 45 0 0 1 {px + 40} {y + 105}~~gge3~0"
+            )
+    shape.append(
+        "SVGNODE~"
+        + json.dumps(
+            {
+                "gId": "g1",
+                "nodeName": "g",
+                "nodeType": 1,
+                "layerid": "19",
+                "attrs": {
+                    "c_width": "100",
+                    "c_height": "100",
+                    "c_rotation": "0,0,0",
+                    "z": "0",
+                    "c_origin": f"{x},{y}",
+                    "uuid": part.model_uuid,
+                    "c_etype": "outline3D",
+                    "id": "g1",
+                    "title": part.name,
+                    "layerid": "19",
+                    "transform": "scale(1) translate(0, 0)",
+                },
+                "childNodes": [],
+            }
+        )
+    )
+    return shape
+
+
+def pin_line(number, name, x, y, rotation):
+    direction = {0: "h -20", 90: "v 20", 180: "h 20", 270: "v -20"}[rotation]
+    return (
+        f"P~show~0~{number}~{x}~{y}~{rotation}~gge{number}~0^^{x}~{y}^^M {x} {y} {direction}~#880000"
+        f"^^1~{x + 5}~{y + 4}~0~{name}~start~~~#0000FF"
+        f"^^1~{x - 5}~{y - 1}~0~{number}~end~~~#0000FF"
+        f"^^0~{x - 3}~{y}^^0~M {x} {y - 3} L {x + 3} {y} L {x} {y + 3}"
+    )
+
+
+def symbol_shape(part):
+    x, y = ORIGIN
+    per_side = (part.pins + 1) // 2
+    half_height = per_side * 5 + 10
+    shape = [
+        f"R~{x - 40}~{y - half_height}~~~80~{2 * half_height}~#880000~1~0~none~gge0~0~"
+    ]
+    for index in range(part.pins):
+        side = index // per_side
+        row = index % per_side
+        px = x - 60 if side == 0 else x + 60
+        py = y - half_height + 15 + row * 10
+        shape.append(pin_line(index + 1, f"IO{index + 1}", px, py, 180 * side))
+    shape.append(f"PL~{x - 20} {y} {x + 20} {y}~#880000~1~0~none~gge1~0")
+    shape.append(
+        f"T~L~{x - 35}~{y - half_height - 5}~0~#0000FF~Arial~5.5pt~normal~start~comment~{part.name}~1~gge2~0~pinpart"
+    )
+    return shape
+
+
+def component_document(title, shape, prefix="U?", c_para=None):
+    x, y = ORIGIN
+    return {
+        "success": True,
+        "code": 0,
+        "result": {
+            "uuid": "",
+            "title": title,
+            "dataStr": {
+                "head": {"x": x, "y": y, "c_para": dict(c_para or {}, pre=prefix)},
+                "shape": shape,
+            },
+            "packageDetail": {"dataStr": {"head": {"c_para": {"pre": prefix}}}},
+        },
+    }
+
+
+def obj_model(vertices, rng):
+    lines = []
+    for material in range(3):
+        lines += [
+            f"newmtl mat{material}",
+            "Ka 0.2 0.2 0.2",
+            f"Kd 0.{material + 1} 0.5 0.5",
+            "Ks 0.1 0.1 0.1",
+            "d 0",
+            "endmtl",
+        ]
+    shapes = 3
+    per_shape = vertices // shapes
+    # as in the EasyEDA models, every vertex comes before the first usemtl
+    lines += [
+        "v " + " ".join(f"{rng.uniform(-250, 250):.4f}" for _ in range(3))
+        for _ in range(shapes * per_shape)
+    ]
+    for shape in range(shapes):
+        lines.append(f"usemtl mat{shape}")
+        base = shape * per_shape + 1
+        for index in range(2 * per_shape - 4):
+            a = base + index // 2
+            lines.append(f"f {a}// {a + 1}// {a + 2}//")
+    return "\n".join(lines) + "\n"
+
+
+def responses(parts=CORPUS, seed=0):
+    """
+    Return {path: body} of every document of `parts`
+    """
+
+    rng = random.Random(seed)
+    served = {}
+    for part in parts:
+        documents = {}
+        documents[PRODUCT_PATH.format(part.component_id)] = {
+            "success": True,
+            "code": 0,
+            "result": [{"component_uuid": uuid} for uuid in part.symbol_uuids]
+            + [{"component_uuid": part.footprint_uuid}],
+        }
+        documents[COMPONENT_PATH.format(part.footprint_uuid)] = component_document(
+            f"{part.name.upper()}-{part.component_id}",
+            footprint_shape(part),
+            c_para={"link": f"https://datasheet.example/{part.component_id}.pdf"},
+        )
+        for unit, uuid in enumerate(part.symbol_uuids):
+            documents[COMPONENT_PATH.format(uuid)] = component_document(
+                f"{part.name}_{part.component_id}" + (f".{unit}" if unit else ""),
+                symbol_shape(part),
+                prefix="R?" if part.pads == "passive" else "U?",
+                c_para={"Resistance": "10k"} if part.pads == "passive" else None,
+            )
+        for path, document in documents.items():
+            served[path] = json.dumps(document).encode()
+
+        if OBJ_PATH.format(part.model_uuid) in served:
+            continue  # copies share the model of their part
+        served[OBJ_PATH.format(part.model_uuid)] = obj_model(
+            part.vertices, rng
+        ).encode()
+        # STEP files are stored as is, only their size matters
+        size = part.vertices * 40
+        served[STEP_PATH.format(part.model_uuid)] = rng.getrandbits(8 * size).to_bytes(
+            size, "little"
+        )
+
+    return served
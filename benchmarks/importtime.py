@@ -0,0 +1,100 @@
+"""
+Import time regression check of the light entry points.
+
+Each entry point is run under `python -X importtime`. The check fails if one of
+them loads a heavy module (requests, KicadModTree, PySide6) or if its imports
+take longer than the budget.
+
+    python benchmarks/importtime.py [-budget MS] [-top N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("requests", "urllib3", "KicadModTree", "PySide6")
+
+ENTRY_POINTS = {
+    "import": "import JLC2KiCadLib.JLC2KiCadLib",
+    "--version": "from JLC2KiCadLib.JLC2KiCadLib import main; main(['--version'])",
+    "--help": "from JLC2KiCadLib.JLC2KiCadLib import main; main(['--help'])",
+    "serve --help": "from JLC2KiCadLib.JLC2KiCadLib import main; main(['serve', '--help'])",
+    "converter": "import JLC2KiCadLib.converter",
+    # --no_footprint only needs get_footprint_info
+    "footprint info": "from JLC2KiCadLib.footprint.footprint import get_footprint_info",
+}
+
+
+def measure(code):
+    """
+    Return ({module: self import time in us}, returncode) of running `code`
+    """
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    modules = {}
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        self_time, _, name = line[len("import time:") :].split("|")
+        if self_time.strip().isdigit():
+            modules[name.strip()] = int(self_time)
+    return modules, process.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-budget",
+        type=float,
+        default=200,
+        help="Maximum import time in ms of each entry point, default is 200",
+    )
+    parser.add_argument(
+        "-top",
+        type=int,
+        default=5,
+        help="Number of slowest modules printed per entry point, default is 5",
+    )
+    args = parser.parse_args()
+
+    failures = []
+    for entry_point, code in ENTRY_POINTS.items():
+        modules, returncode = measure(code)
+        total = sum(modules.values()) / 1000
+        heavy = sorted(
+            name
+            for name in modules
+            if name.split(".")[0] in HEAVY_MODULES and "." not in name
+        )
+        print(f"{entry_point:<16}{total:8.1f} ms  {len(modules)} modules")
+        for name, self_time in sorted(modules.items(), key=lambda item: -item[1])[
+            : args.top
+        ]:
+            print(f"{'':<16}{self_time / 1000:8.1f} ms  {name}")
+
+        if returncode != 0:
+            failures.append(f"{entry_point}: exited with code {returncode}")
+        if heavy:
+            failures.append(f"{entry_point}: loads {', '.join(heavy)}")
+        if total > args.budget:
+            failures.append(
+                f"{entry_point}: {total:.1f} ms over the {args.budget:g} ms budget"
+            )
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
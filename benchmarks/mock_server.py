@@ -0,0 +1,185 @@
+"""
+Local stand-in for the EasyEDA endpoints, serving the synthetic corpus of
+fixtures.py with configurable latency, errors and rate limit.
+
+    python benchmarks/mock_server.py [-port P] [-copies N] [-latency MS]
+                                     [-jitter MS] [-error_rate R]
+                                     [-rate_limit N] [-bom FILE]
+
+Point the converter to it with the base URL options (or the
+JLC2KICAD_EASYEDA_URL and JLC2KICAD_MODULES_URL environment variables), and a
+separate cache so that the mock documents never end up in the real cache:
+
+    JLC2KiCadLib --bom mock_bom.csv -jobs 8 -cache_dir /tmp/mock_cache \\
+        -easyeda_url http://127.0.0.1:8088 -modules_url http://127.0.0.1:8088
+
+GET /stats returns the number of answers per status and per endpoint.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import fixtures
+
+
+class TokenBucket:
+    """
+    Allow `rate` requests per second on average, in bursts of up to `rate`
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def endpoint_name(path):
+    for name, template in (
+        ("products", fixtures.PRODUCT_PATH),
+        ("components", fixtures.COMPONENT_PATH),
+        ("step", fixtures.STEP_PATH),
+        ("obj", fixtures.OBJ_PATH),
+    ):
+        if path.startswith(template.partition("{")[0]):
+            return name
+    return path
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as easyeda.com
+
+    def do_GET(self):
+        server = self.server
+        path = urlsplit(self.path).path
+
+        if path == "/stats":
+            with server.stats_lock:
+                self.answer(HTTPStatus.OK, json.dumps(server.stats).encode())
+            return
+
+        if server.latency or server.jitter:
+            time.sleep((server.latency + random.uniform(0, server.jitter)) / 1000)
+
+        if server.bucket is not None and not server.bucket.take():
+            self.answer(HTTPStatus.TOO_MANY_REQUESTS, b"", {"Retry-After": "1"})
+        elif random.random() < server.error_rate:
+            self.answer(HTTPStatus.SERVICE_UNAVAILABLE, b"")
+        elif path in server.responses:
+            since = self.headers.get("If-Modified-Since")
+            if since and parsedate_to_datetime(since).timestamp() >= server.started:
+                self.answer(HTTPStatus.NOT_MODIFIED, b"")
+            else:
+                self.answer(HTTPStatus.OK, server.responses[path])
+        elif path.startswith("/api/products/"):
+            # easyeda.com answers unknown part # with success false
+            self.answer(
+                HTTPStatus.OK, json.dumps({"success": False, "code": 404}).encode()
+            )
+        else:
+            self.answer(HTTPStatus.NOT_FOUND, b"")
+
+    def answer(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Last-Modified", formatdate(self.server.started, usegmt=True))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+        endpoint = endpoint_name(urlsplit(self.path).path)
+        with self.server.stats_lock:
+            by_status = self.server.stats["status"]
+            by_status[str(int(status))] = by_status.get(str(int(status)), 0) + 1
+            by_endpoint = self.server.stats["endpoint"]
+            by_endpoint[endpoint] = by_endpoint.get(endpoint, 0) + 1
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-host", type=str, default="127.0.0.1")
+    parser.add_argument("-port", type=int, default=8088)
+    parser.add_argument(
+        "-copies",
+        type=int,
+        default=0,
+        help="Also serve N copies of each corpus part under new part #, default is 0",
+    )
+    parser.add_argument(
+        "-latency", type=float, default=0, help="Delay of each answer in ms"
+    )
+    parser.add_argument(
+        "-jitter", type=float, default=0, help="Random extra delay up to MS"
+    )
+    parser.add_argument(
+        "-error_rate",
+        type=float,
+        default=0,
+        help="Fraction of the requests answered 503, default is 0",
+    )
+    parser.add_argument(
+        "-rate_limit",
+        type=float,
+        default=0,
+        help="Requests per second above which 429 is answered, default is no limit",
+    )
+    parser.add_argument(
+        "-bom", type=str, default=None, help="Write the served part # into FILE"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Log each request")
+    args = parser.parse_args()
+
+    parts = fixtures.corpus(args.copies)
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    server.daemon_threads = True
+    server.responses = fixtures.responses(parts)
+    server.started = time.time()
+    server.latency = args.latency
+    server.jitter = args.jitter
+    server.error_rate = args.error_rate
+    server.bucket = TokenBucket(args.rate_limit) if args.rate_limit > 0 else None
+    server.verbose = args.verbose
+    server.stats = {"status": {}, "endpoint": {}}
+    server.stats_lock = threading.Lock()
+
+    if args.bom:
+        with open(args.bom, "w") as f:
+            f.write("LCSC Part #\n")
+            f.writelines(f"{part.component_id}\n" for part in parts)
+
+    print(f"serving {len(parts)} parts on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats, indent=1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
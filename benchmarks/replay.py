@@ -0,0 +1,61 @@
+"""
+requests transport adapter answering from in-memory responses, mounted on the
+shared sessions of JLC2KiCadLib.client so that the conversion code runs
+unchanged without any network access.
+"""
+
+import io
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from JLC2KiCadLib import client
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answer each request with the body stored for its path ({path: bytes}),
+    or 404 if there is none
+    """
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = responses
+        self.requests = 0
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        self.requests += 1
+        body = self.responses.get(urlsplit(request.url).path)
+
+        response = requests.Response()
+        response.status_code = 404 if body is None else 200
+        response.reason = "Not Found" if body is None else "OK"
+        response.headers = CaseInsensitiveDict(
+            {"Content-Length": str(len(body or b""))}
+        )
+        response.raw = io.BytesIO(body or b"")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def install(responses):
+    """
+    Serve the requests of the client from `responses`, return the adapter.
+    client.configure() closes the sessions, install again after calling it.
+    """
+
+    adapter = ReplayAdapter(responses)
+    for url in (client.EASYEDA_URL, client.MODULES_URL):
+        session = client.get_session(url)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+    return adapter
@@ -1,26 +1,31 @@
 import sys
 import os
+import re
+import threading
+import time
 from typing import Optional
 from PySide6.QtGui import QIcon, QPixmap
-from PySide6.QtCore import QFile, QIODevice, QCoreApplication, QSettings
+from PySide6.QtCore import (
+    QFile, QIODevice, QCoreApplication, QSettings, QObject, QRunnable, QThreadPool, Signal
+)
 from PySide6.QtWidgets import (
-    QApplication, QDialog,
+    QApplication, QDialog, QLabel,
     QLineEdit, QPushButton, QDialogButtonBox, QComboBox, QCheckBox,
-    QFileDialog, QMessageBox, QWidget, QTabWidget, QListWidget, QRadioButton, QListWidgetItem
+    QFileDialog, QMessageBox, QWidget, QTabWidget, QListWidget, QRadioButton, QListWidgetItem,
+    QTableWidget, QTableWidgetItem, QHeaderView, QSpinBox, QVBoxLayout, QHBoxLayout
 )
 from PySide6.QtUiTools import QUiLoader
 
-# Importiere main direct from project
-from JLC2KiCadLib.JLC2KiCadLib import main as jlc_main
+# Die Library-API wird erst bei der ersten Konvertierung importiert
+from JLC2KiCadLib.helper import set_logging
 
 # set application and organization name 
 QCoreApplication.setOrganizationName("Knartz Software Bude")
 QCoreApplication.setApplicationName("JLC2KiCadGUI")
 
-class CommandBuilder:
+class OptionsBuilder:
     def __init__(
         self,
-        part_number: str,
         output_dir: str,
         symbol_lib: str,
         symbol_dir: str,
@@ -34,7 +39,6 @@ class CommandBuilder:
         download_symbols: bool,
         download_footprint: bool
     ):
-        self.part_number = part_number
         self.output_dir = output_dir
         self.symbol_lib = symbol_lib
         self.symbol_dir = symbol_dir
@@ -48,40 +52,81 @@ class CommandBuilder:
         self.download_symbols = download_symbols
         self.download_footprint = download_footprint
 
-    def build(self) -> list[str]:
-        cmd = ["JLC2KiCadLib", self.part_number]
-        cmd += ["-dir", self.output_dir]
+    def build(self) -> dict:
+        """
+        Optionen für JLC2KiCadLib.converter.Converter, nicht gesetzte Optionen
+        behalten den Standardwert der Kommandozeile
+        """
+        options = {"output_dir": self.output_dir}
         if self.symbol_lib:
-            cmd += ["-symbol_lib", self.symbol_lib]
+            options["symbol_lib"] = self.symbol_lib
         if self.symbol_dir:
-            cmd += ["-symbol_lib_dir", self.symbol_dir]
+            options["symbol_lib_dir"] = self.symbol_dir
         if not self.download_symbols:
-            cmd.append("--no_symbol")
+            options["symbol_creation"] = False
 
         if not self.download_footprint:
-            cmd.append("--no_footprint")
+            options["footprint_creation"] = False
         else:
-            cmd += ["-footprint_lib", self.footprint_dir]
-            if self.model_type == "NO":
-                cmd.append("-models")
-            else:
-                cmd += ["-models", self.model_type]
-            cmd += ["-model_dir", self.model_dir]
-            cmd += ["-model_base_variable", self.model_var]
+            options["footprint_lib"] = self.footprint_dir
+            options["models"] = [] if self.model_type == "NO" else [self.model_type]
+            options["model_dir"] = self.model_dir
+            options["model_base_variable"] = self.model_var
 
         if self.use_log_file:
-            cmd.append("--log_file")
-            cmd += ["-logging_level", self.logging_level]
-        
+            options["log_file"] = True
+            options["logging_level"] = self.logging_level
+
         if self.skip_existing:
-            cmd.append("--skip_existing")
-        
-        
-        
-        
-        
+            options["skip_existing"] = True
+
+        return options
+
+STAGE_TEXT = {
+    "fetch":     "fetching component",
+    "footprint": "creating footprint",
+    "models":    "downloading 3D models",
+    "symbol":    "creating symbol",
+    "done":      "done",
+}
+
+
+class ConversionSignals(QObject):
+    # (part)
+    started = Signal(str)
+    # (part, stage)
+    progress = Signal(str, str)
+    # (part, error message, empty on success)
+    finished = Signal(str, str)
+
+
+class ConversionTask(QRunnable):
+    """
+    Konvertiert ein Bauteil im Thread-Pool, damit die Oberfläche bedienbar bleibt.
+    """
+    def __init__(self, options: dict, part: str, cancel_event: threading.Event):
+        super().__init__()
+        self.options = options
+        self.part = part
+        self.cancel_event = cancel_event
+        self.signals = ConversionSignals()
+
+    def run(self) -> None:
+        self.signals.started.emit(self.part)
+        try:
+            from JLC2KiCadLib.converter import Converter
+
+            results = Converter(**self.options).convert(
+                [self.part],
+                progress=self.signals.progress.emit,
+                cancel_event=self.cancel_event,
+            )
+        except Exception as e:
+            self.signals.finished.emit(self.part, str(e) or type(e).__name__)
+        else:
+            errors = [result.error for result in results if not result.success]
+            self.signals.finished.emit(self.part, "; ".join(errors))
 
-        return cmd
 
 class Widget(QDialog):
     def __init__(self, ui_filename: str, parent: Optional[QWidget] = None):
@@ -132,6 +177,25 @@ class Widget(QDialog):
         self.model_wrl_rb           = self.findChild(QRadioButton,      'radioButton_Model_wrl')
         self.tab_widget             = self.findChild(QTabWidget,        'tabWidget')
         self.list_widget            = self.findChild(QListWidget,       'listWidget')
+
+        # Statuszeile über den Buttons
+        self.status_label = QLabel(self)
+        if layout is not None:
+            index = layout.indexOf(self.button_box) if self.button_box else -1
+            layout.insertWidget(index if index >= 0 else layout.count(), self.status_label)
+
+        # Konvertierungen laufen parallel im Thread-Pool
+        workers = int(self.settings.value("workers", 4, type=int))
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(workers)
+        self.cancel_event = threading.Event()
+        self.running = 0
+
+        # Warteschlange: part -> Tabellenzeile, Optionen und Startzeit
+        self.queue_rows: dict[str, int] = {}
+        self.queue_options: dict[str, dict] = {}
+        self.start_times: dict[str, float] = {}
+        self._create_queue_tab(workers)
         # Initiales Füllen des output-Dir-Felds
         start_dir = self._get_start_dir()
         if self.output_dir_input:
@@ -183,6 +247,105 @@ class Widget(QDialog):
             self.list_widget.currentItemChanged.connect(self._on_symbol_selected)
 
 
+    def _create_queue_tab(self, workers: int) -> None:
+        """
+        Erstellt den Tab mit der Warteschlange: eine Zeile pro Bauteil mit Status
+        und Dauer, die Anzahl paralleler Worker und einen Retry-Button.
+        """
+        queue_tab = self.queue_tab = QWidget(self)
+        queue_layout = QVBoxLayout(queue_tab)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Workers", queue_tab))
+        self.workers_spin = QSpinBox(queue_tab)
+        self.workers_spin.setRange(1, 16)
+        self.workers_spin.setValue(workers)
+        self.workers_spin.valueChanged.connect(self._on_workers_changed)
+        controls.addWidget(self.workers_spin)
+        controls.addStretch()
+        self.retry_button = QPushButton("Retry failed", queue_tab)
+        self.retry_button.clicked.connect(self.retry_failed)
+        controls.addWidget(self.retry_button)
+        self.clear_button = QPushButton("Clear done", queue_tab)
+        self.clear_button.clicked.connect(self.clear_done)
+        controls.addWidget(self.clear_button)
+        queue_layout.addLayout(controls)
+
+        self.queue_table = QTableWidget(0, 3, queue_tab)
+        self.queue_table.setHorizontalHeaderLabels(["Part", "Status", "Time"])
+        self.queue_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.queue_table.verticalHeader().setVisible(False)
+        self.queue_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        queue_layout.addWidget(self.queue_table)
+
+        if self.tab_widget:
+            self.tab_widget.addTab(queue_tab, "Queue")
+
+
+    def _on_workers_changed(self, value: int) -> None:
+        self.thread_pool.setMaxThreadCount(value)
+        self.settings.setValue("workers", value)
+
+
+    def _set_row(self, part: str, status: Optional[str] = None, duration: Optional[str] = None) -> None:
+        row = self.queue_rows.get(part)
+        if row is None:
+            row = self.queue_table.rowCount()
+            self.queue_table.insertRow(row)
+            self.queue_table.setItem(row, 0, QTableWidgetItem(part))
+            self.queue_table.setItem(row, 1, QTableWidgetItem(""))
+            self.queue_table.setItem(row, 2, QTableWidgetItem(""))
+            self.queue_rows[part] = row
+        if status is not None:
+            self.queue_table.item(row, 1).setText(status)
+            self.queue_table.item(row, 1).setToolTip(status)
+        if duration is not None:
+            self.queue_table.item(row, 2).setText(duration)
+
+
+    def _enqueue(self, part: str, options: dict) -> None:
+        task = ConversionTask(options, part, self.cancel_event)
+        task.signals.started.connect(self._on_started)
+        task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(self._on_finished)
+        self.queue_options[part] = options
+        self.running += 1
+        self._set_row(part, "queued", "")
+        self.thread_pool.start(task)
+        self._update_status()
+
+
+    def _update_status(self) -> None:
+        self.status_label.setText(f"{self.running} part(s) pending" if self.running else "")
+
+
+    def _is_active(self, part: str) -> bool:
+        row = self.queue_rows.get(part)
+        if row is None:
+            return False
+        status = self.queue_table.item(row, 1).text()
+        return status == "queued" or (status in STAGE_TEXT.values() and status != "done")
+
+
+    def retry_failed(self) -> None:
+        for part, row in list(self.queue_rows.items()):
+            status = self.queue_table.item(row, 1).text()
+            if status != "done" and not self._is_active(part):
+                self._enqueue(part, self.queue_options[part])
+
+
+    def clear_done(self) -> None:
+        for part in [part for part, row in self.queue_rows.items()
+                     if self.queue_table.item(row, 1).text() == "done"]:
+            self.queue_table.removeRow(self.queue_rows.pop(part))
+            self.queue_options.pop(part, None)
+            # Zeilennummern nach dem Entfernen neu zuordnen
+            self.queue_rows = {
+                self.queue_table.item(row, 0).text(): row
+                for row in range(self.queue_table.rowCount())
+            }
+
+
     def choose_output_dir(self) -> None:
         """
         Öffnet den Verzeichniswahl-Dialog. Wenn kein start_dir übergeben
@@ -370,7 +533,9 @@ class Widget(QDialog):
 
 
     def process(self):
-        part    = (self.part_input.text().strip() if self.part_input else '')
+        # mehrere Bauteile können durch Leerzeichen, Komma oder Semikolon getrennt werden
+        parts   = [p for p in re.split(r"[\s,;]+", self.part_input.text()) if p] if self.part_input else []
+        part    = ' '.join(parts)
         out     = (self.output_dir_input.text().strip() if self.output_dir_input else '')
 
             # Überprüfen, ob part und out nicht leer sind
@@ -418,19 +583,52 @@ class Widget(QDialog):
         if self.model_step_rb:
             self.settings.setValue("model_type",        self._get_model_type())
 
-        cmd = CommandBuilder(part, out, lib, sym, ftp, mod, mod_var, mod_type, use, lvl, skip, dwn_sym, dwn_ftp).build()
-        print(f"\nGenerated command: {cmd}\n" )
+        set_logging(lvl if use else 'INFO', use)
 
-        old_argv = sys.argv.copy()
-        try:
-            sys.argv = cmd
-            jlc_main()
-            QMessageBox.information(self, "Complete", f"Component {part} has been processed.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Processing failed:\n{e}")
-        finally:
-            sys.argv = old_argv
-            self.accept()
+        for part in dict.fromkeys(parts):
+            if self._is_active(part):
+                continue  # bereits in der Warteschlange
+            options = OptionsBuilder(out, lib, sym, ftp, mod, mod_var, mod_type, use, lvl, skip, dwn_sym, dwn_ftp).build()
+            print(f"\nConversion options for {part}: {options}\n" )
+            self._enqueue(part, options)
+
+        if self.tab_widget:
+            self.tab_widget.setCurrentWidget(self.queue_tab)
+
+        # Eingabefeld leeren, damit die nächsten Bauteile eingegeben werden können
+        if self.part_input:
+            self.part_input.clear()
+
+
+    def _on_started(self, part: str) -> None:
+        self.start_times[part] = time.monotonic()
+
+
+    def _on_progress(self, part: str, stage: str) -> None:
+        self._set_row(part, STAGE_TEXT.get(stage, stage))
+
+
+    def _on_finished(self, part: str, error: str) -> None:
+        self.running -= 1
+        start = self.start_times.pop(part, None)
+        duration = f"{time.monotonic() - start:.1f} s" if start is not None else ""
+        self._set_row(part, error or "done", duration)
+        self._update_status()
+
+
+    def reject(self) -> None:
+        """
+        Cancel bricht laufende Konvertierungen ab, ohne laufende Konvertierung
+        wird der Dialog geschlossen.
+        """
+        if self.running > 0:
+            # die laufenden Bauteile werden abgebrochen, danach eingereihte
+            # Bauteile bekommen ein neues Event
+            self.cancel_event.set()
+            self.cancel_event = threading.Event()
+            self.status_label.setText("Cancelling ...")
+            return
+        super().reject()
 
 
 if __name__ == '__main__':